@@ -1,12 +1,39 @@
 """File with the sat solver functions"""
+import random
+import time
+from collections import deque
+
+from cnf import CNF
+from decision import VSIDS, OccurrenceIndex
+from preprocess import strongly_connected_components
+
 # TODO: DPLL finish iterative and include improvements
 # ----------------------------------------------------------------------------------------------------------------------
 # ----------------------------------------------------------------------------------------------------------------------
 
-''' Main DPLL sat solver function'''
+''' Main DPLL sat solver function, watched=True uses the two watched literals propagation engine.
+    statistics=True returns the search statistics with the model, and budget (a Budget) stops the search with
+    UNKNOWN once exhausted, only for the watched literals engine'''
+
+
+def dpll_recursive(clauses, symbols, watched=False, statistics=False, budget=None):
+    if watched:
+        engine = Propagator(clauses, symbols)
+        start = time.time()
+        if budget is not None:
+            budget.start(engine.stats)
+        model = False if engine.unsat else dpll_watched(engine, branching_order(engine, symbols), budget=budget)
+        engine.stats.time = time.time() - start
+        return (model, engine.stats) if statistics else model
 
+    if statistics:
+        raise ValueError('statistics are only kept by the watched literals engine')
+    if budget is not None:
+        raise ValueError('budgets are only checked by the watched literals engine')
+
+    if isinstance(clauses, CNF):  # at most one constraints become clauses
+        clauses = clauses.to_lists()
 
-def dpll_recursive(clauses, symbols):
     return dpll(clauses, symbols, dict())
 
 
@@ -88,18 +115,15 @@ def check_clause(clause, model):
 
 
 def find_pure_symbol(symbols, clauses):
+    # literals occurring in clauses, found in a single pass
+    literals = set()
+    for clause in clauses:
+        literals.update(clause)
+
     for symbol in symbols:
 
         # Boolean variables used to determine if pure symbol is found
-        pos_found, neg_found = False, False
-
-        for clause in clauses:
-
-            if not pos_found and symbol in clause:
-                pos_found = True  # positive symbol found in clause
-
-            if not neg_found and -symbol in clause:
-                neg_found = True  # negative symbol found in clause
+        pos_found, neg_found = symbol in literals, -symbol in literals
 
         if pos_found != neg_found:  # if a pure symbol is found, return it
             return symbol, pos_found
@@ -169,10 +193,33 @@ def extend_model(model, symbol, value):
 # ----------------------------------------------------------------------------------------------------------------------
 # ----------------------------------------------------------------------------------------------------------------------
 
-"""DPLL algorithm, iterative implementation"""
-
-
-def dpll_iterative(clauses, symbols):
+"""DPLL algorithm, iterative implementation, watched=True uses the two watched literals propagation engine with
+   a trail of decision levels (non recursive, recommended for large time horizons), where pure=True assigns the
+   pure literals found by an occurrence index before branching. statistics=True returns the search statistics with
+   the model, and budget (a Budget) stops the search with UNKNOWN once exhausted, only for the watched literals
+   engine"""
+
+
+def dpll_iterative(clauses, symbols, watched=False, pure=False, statistics=False, budget=None):
+    if watched:
+        engine = Propagator(clauses, symbols)
+        start = time.time()
+        if budget is not None:
+            budget.start(engine.stats)
+        model = False
+        if not engine.unsat:
+            index = OccurrenceIndex(engine.clauses, engine.n_vars, engine.at_most_one) if pure else None
+            model = dpll_trail(engine, branching_order(engine, symbols), index, budget)
+        engine.stats.time = time.time() - start
+        return (model, engine.stats) if statistics else model
+
+    if statistics:
+        raise ValueError('statistics are only kept by the watched literals engine')
+    if budget is not None:
+        raise ValueError('budgets are only checked by the watched literals engine')
+
+    if isinstance(clauses, CNF):  # clauses are changed during the search
+        clauses = clauses.to_lists()
 
     # Initializations
     model = dict()
@@ -394,3 +441,1813 @@ def backtrack(p, value, symbols, model, clauses, assigned_symbols, modified_clau
             assign_order.remove(p)
             blevel += 1
         return p, value
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+class Statistics:
+    """Counters of the search done by a solver, kept with plain integer increments in its loops so they can always
+    stay on. time is the total time spent in the solver calls"""
+
+    def __init__(self):
+        self.decisions = 0  # branching decisions, assumptions included
+        self.propagations = 0  # literals implied by unit propagation, decisions excluded
+        self.conflicts = 0  # conflicts found
+        self.restarts = 0  # restarts done
+        self.learned = 0  # clauses learned
+        self.deleted = 0  # learned clauses deleted by database reductions
+        self.learnts = 0  # learned clauses in the database now
+        self.max_learnts = 0  # most learned clauses in the database at once
+        self.reductions = []  # (conflicts, size before, size after) of each database reduction
+        self.max_level = 0  # highest decision level reached
+        self.time = 0.0  # seconds spent searching
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the propagations done per second of search'''
+
+    def propagations_per_second(self):
+        return self.propagations / self.time if self.time > 0 else 0.0
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the statistics as a dictionary, e.g. to write them as JSON'''
+
+    def as_dict(self):
+
+        return {
+            'decisions': self.decisions,
+            'propagations': self.propagations,
+            'conflicts': self.conflicts,
+            'restarts': self.restarts,
+            'learned': self.learned,
+            'deleted': self.deleted,
+            'learnts': self.learnts,
+            'max_learnts': self.max_learnts,
+            'reductions': [list(reduction) for reduction in self.reductions],
+            'max_level': self.max_level,
+            'time': self.time,
+            'propagations_per_second': self.propagations_per_second(),
+        }
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the statistics kept in a dictionary written by as_dict. The learned clause database
+       counters are missing from older dictionaries, and are left at 0'''
+
+    @staticmethod
+    def from_dict(values):
+
+        stats = Statistics()
+        for name in ('decisions', 'propagations', 'conflicts', 'restarts', 'learned', 'deleted', 'max_level', 'time'):
+            setattr(stats, name, values[name])
+        stats.learnts = values.get('learnts', 0)
+        stats.max_learnts = values.get('max_learnts', 0)
+        stats.reductions = [tuple(reduction) for reduction in values.get('reductions', ())]
+
+        return stats
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the statistics as a line of text'''
+
+    def __str__(self):
+
+        return ('%d decisions, %d propagations, %d conflicts, %d restarts, %d learned, %d deleted, %d learnts kept '
+                '(peak %d), %d reductions, max level %d, %.3f [s], %.0f propagations/s' %
+                (self.decisions, self.propagations, self.conflicts, self.restarts, self.learned, self.deleted,
+                 self.learnts, self.max_learnts, len(self.reductions), self.max_level, self.time,
+                 self.propagations_per_second()))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Result of a search stopped by its budget before finding a model or proving there is none. It is the None the
+   local search solvers already return when they give up, so unlike False it never means unsatisfiable"""
+
+UNKNOWN = None
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+class Budget:
+    """Limits of a solver call, None meaning no limit: max_time seconds of wall time, max_conflicts conflicts,
+    max_decisions decisions and max_memory megabytes of learned clauses (an estimate, the other structures of the
+    solvers do not grow during the search). Conflicts and decisions are counted from the statistics of the solver
+    since the call started. Solvers check the budget at each decision and conflict and return UNKNOWN once it is
+    exhausted; the clock is only read every check_interval checks, to keep the check cheap"""
+
+    def __init__(self, max_time=None, max_conflicts=None, max_decisions=None, max_memory=None, check_interval=100):
+        self.max_time = max_time
+        self.max_conflicts = max_conflicts
+        self.max_decisions = max_decisions
+        self.max_memory = max_memory
+        self.check_interval = check_interval
+        self.deadline = None  # time at which the current call must stop
+        self.conflicts_limit = None  # conflicts count of the statistics at which the current call must stop
+        self.decisions_limit = None  # decisions count of the statistics at which the current call must stop
+        self.countdown = 0  # checks left until the clock is read again
+        self.exhausted_by = None  # limit that stopped the last call: 'time', 'conflicts', 'decisions' or 'memory'
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that starts the budget of a solver call, whose statistics are stats'''
+
+    def start(self, stats):
+
+        self.deadline = time.time() + self.max_time if self.max_time is not None else None
+        self.conflicts_limit = stats.conflicts + self.max_conflicts if self.max_conflicts is not None else None
+        self.decisions_limit = stats.decisions + self.max_decisions if self.max_decisions is not None else None
+        self.countdown = 0  # the clock is read at the first check
+        self.exhausted_by = None
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that checks if the budget is exhausted, given the statistics of the solver and the approximate
+       memory (in bytes) of its learned clauses'''
+
+    def exhausted(self, stats, memory=0):
+
+        if self.conflicts_limit is not None and stats.conflicts >= self.conflicts_limit:
+            self.exhausted_by = 'conflicts'
+        elif self.decisions_limit is not None and stats.decisions >= self.decisions_limit:
+            self.exhausted_by = 'decisions'
+        elif self.max_memory is not None and memory > self.max_memory * 1048576:
+            self.exhausted_by = 'memory'
+        else:
+            if self.deadline is None:
+                return False
+            self.countdown -= 1
+            if self.countdown > 0:
+                return False
+            self.countdown = self.check_interval
+            if time.time() < self.deadline:
+                return False
+            self.exhausted_by = 'time'
+
+        return True
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+class Propagator:
+    """Unit propagation engine based on two watched literals per clause. Binary clauses are kept apart as
+    implication lists, propagated before the longer clauses, and so are the at most one constraints of a CNF,
+    which make all their other literals false once one of them is true"""
+
+    def __init__(self, clauses, symbols):
+        n_vars = max(symbols) if symbols else 0
+        if isinstance(clauses, CNF):
+            n_vars = max(n_vars, clauses.max_symbol())
+        else:
+            for clause in clauses:
+                for literal in clause:
+                    if abs(literal) > n_vars:
+                        n_vars = abs(literal)
+
+        self.n_vars = n_vars  # highest variable index in the problem
+        self.values = [None] * (n_vars + 1)  # truth value of each variable, None if unassigned
+        self.level = [0] * (n_vars + 1)  # decision level at which each variable was assigned
+        self.reason = [None] * (n_vars + 1)  # clause that implied each variable, None for decisions and units
+        self.trail = []  # assigned literals, in assignment order
+        self.trail_lim = []  # trail size at the start of each decision level
+        self.qhead = 0  # position in trail of the next literal to propagate through the longer clauses
+        self.bhead = 0  # position in trail of the next literal to propagate through the binary clauses
+        self.clauses = []  # clauses with at least two literals, watched literals in positions 0 and 1
+        self.watches = dict()  # literal -> clauses with more than two literals watching it
+        self.binaries = dict()  # literal -> (implied literal, reason clause) for each binary clause with it
+        self.at_most_one = []  # at most one constraints with more than two literals
+        self.exclusions = dict()  # literal -> at most one constraints with it
+        self.unsat = False  # True if an empty clause (or two opposite units) was found
+        self.stats = Statistics()  # counters of the search
+
+        for clause in clauses:
+            Propagator.add_clause(self, clause)  # subclasses may extend add_clause for later clauses
+
+        if isinstance(clauses, CNF):
+            for literals in clauses.at_most_one:
+                self.add_at_most_one(literals)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that adds a clause to the engine, enqueueing it if it is unit'''
+
+    def add_clause(self, clause):
+
+        # remove repeated literals and ignore tautologies
+        clause = list(set(clause))
+        for literal in clause:
+            if -literal in clause:
+                return
+
+        if len(clause) == 0:
+            self.unsat = True
+
+        elif len(clause) == 1:
+            if not self.assign(clause[0]):  # opposite unit clause already assigned
+                self.unsat = True
+
+        else:
+            self.clauses.append(clause)
+            self.watch(clause)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that adds the constraint that at most one of literals is true, at decision level 0. Constraints
+       with two literals, or with opposite literals, are added as binary clauses'''
+
+    def add_at_most_one(self, literals):
+
+        literals = list(set(literals))
+        if len(literals) < 3 or any(-literal in literals for literal in literals):
+            for i in range(len(literals)):
+                for j in range(i + 1, len(literals)):
+                    Propagator.add_clause(self, [-literals[i], -literals[j]])
+            return
+
+        self.at_most_one.append(literals)
+        exclusions = self.exclusions
+        for literal in literals:
+            exclusions.setdefault(literal, []).append(literals)
+
+        # a literal already true excludes the others now, it was propagated before the constraint existed
+        for literal in literals:
+            if self.value(literal):
+                for other in literals:
+                    if other != literal and not self.assign(-other, [-other, -literal]):
+                        self.unsat = True
+                break
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that makes the first two literals of clause watch it, or adds the implications of a binary clause.
+       The reason of a binary implication is a copy of the clause with the implied literal first'''
+
+    def watch(self, clause):
+
+        if len(clause) == 2:
+            first, second = clause[0], clause[1]
+            binaries = self.binaries
+            binaries.setdefault(first, []).append((second, [second, first]))
+            binaries.setdefault(second, []).append((first, [first, second]))
+            return
+
+        watches = self.watches
+        watches.setdefault(clause[0], []).append(clause)
+        watches.setdefault(clause[1], []).append(clause)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the truth value of a literal, or None if its symbol is unassigned'''
+
+    def value(self, literal):
+
+        val = self.values[abs(literal)]
+        if val is None:
+            return None
+
+        return val == (literal > 0)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that makes literal true, with the clause that implied it, returning False if it is already false'''
+
+    def assign(self, literal, reason=None):
+
+        val = self.value(literal)
+        if val is not None:
+            return val
+
+        symbol = abs(literal)
+        self.values[symbol] = literal > 0
+        self.level[symbol] = len(self.trail_lim)
+        self.reason[symbol] = reason
+        self.trail.append(literal)
+
+        return True
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that propagates all the pending assignments in the trail, first through the binary implications
+       and at most one constraints of every pending literal and then through the clauses watching a literal that
+       became false. Implications of an at most one constraint get a binary reason clause, built when needed.
+       Returns the conflicting clause, or None if no conflict was found'''
+
+    def propagate(self):
+
+        values = self.values
+        level = self.level
+        reason = self.reason
+        trail = self.trail
+        watches = self.watches
+        binaries = self.binaries
+        exclusions = self.exclusions
+        current_level = len(self.trail_lim)
+        assigned = len(trail)  # trail size before propagating, literals added after it are implied
+
+        while self.qhead < len(trail):
+            # binary clauses first, they are cheaper and find most implications and conflicts
+            while self.bhead < len(trail):
+                true_literal = trail[self.bhead]
+                self.bhead += 1
+
+                for implied, clause in binaries.get(-true_literal, ()):
+                    symbol = abs(implied)
+                    val = values[symbol]
+                    if val is None:
+                        values[symbol] = implied > 0
+                        level[symbol] = current_level
+                        reason[symbol] = clause
+                        trail.append(implied)
+                    elif val != (implied > 0):  # both literals false, conflict
+                        self.stats.propagations += len(trail) - assigned
+                        self.stats.conflicts += 1
+                        self.qhead = self.bhead = len(trail)
+                        return clause
+
+                for literals in exclusions.get(true_literal, ()):
+                    for other in literals:
+                        if other == true_literal:
+                            continue
+                        symbol = abs(other)
+                        val = values[symbol]
+                        if val is None:
+                            values[symbol] = other < 0
+                            level[symbol] = current_level
+                            reason[symbol] = [-other, -true_literal]
+                            trail.append(-other)
+                        elif val == (other > 0):  # two literals true, conflict
+                            self.stats.propagations += len(trail) - assigned
+                            self.stats.conflicts += 1
+                            self.qhead = self.bhead = len(trail)
+                            return [-other, -true_literal]
+
+            false_literal = -trail[self.qhead]
+            self.qhead += 1
+
+            watch_list = watches.get(false_literal)
+            if not watch_list:
+                continue
+
+            i = 0  # clauses still watching false_literal are kept in watch_list[:i]
+            j = 0  # iterator in watch_list
+            while j < len(watch_list):
+                clause = watch_list[j]
+                j += 1
+
+                # make sure the false literal is in position 1
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], false_literal
+
+                # clause already satisfied by the other watched literal
+                first = clause[0]
+                val = values[abs(first)]
+                if val is not None and val == (first > 0):
+                    watch_list[i] = clause
+                    i += 1
+                    continue
+
+                # look for a literal that is not false to watch instead
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    val = values[abs(literal)]
+                    if val is None or val == (literal > 0):
+                        clause[1], clause[k] = literal, false_literal
+                        watches.setdefault(literal, []).append(clause)
+                        break
+
+                else:  # no new watch found, clause is unit or conflicting
+                    watch_list[i] = clause
+                    i += 1
+
+                    if values[abs(first)] is not None:  # first literal is false, conflict
+                        while j < len(watch_list):
+                            watch_list[i] = watch_list[j]
+                            i += 1
+                            j += 1
+                        del watch_list[i:]
+                        self.stats.propagations += len(trail) - assigned
+                        self.stats.conflicts += 1
+                        self.qhead = self.bhead = len(trail)
+
+                        return clause
+
+                    # unit clause, assign remaining literal
+                    symbol = abs(first)
+                    values[symbol] = first > 0
+                    level[symbol] = current_level
+                    reason[symbol] = clause
+                    trail.append(first)
+
+            del watch_list[i:]
+
+        self.stats.propagations += len(trail) - assigned
+        return None
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that undoes every assignment made after the trail had size mark'''
+
+    def undo(self, mark):
+
+        values = self.values
+        trail = self.trail
+        while len(trail) > mark:
+            values[abs(trail.pop())] = None
+
+        self.qhead = self.bhead = len(trail)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the current decision level'''
+
+    def decision_level(self):
+        return len(self.trail_lim)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that opens a new decision level, marking the current trail position, for a decision'''
+
+    def new_decision_level(self):
+
+        self.trail_lim.append(len(self.trail))
+        self.stats.decisions += 1
+        if len(self.trail_lim) > self.stats.max_level:
+            self.stats.max_level = len(self.trail_lim)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that undoes every assignment above decision level, closing the levels above it'''
+
+    def cancel_until(self, level):
+
+        if len(self.trail_lim) > level:
+            self.undo(self.trail_lim[level])
+            del self.trail_lim[level:]
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the current assignment as a model dictionary'''
+
+    def model(self):
+
+        values = self.values
+        return {symbol: values[symbol] for symbol in range(1, self.n_vars + 1) if values[symbol] is not None}
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Function that returns the symbols in branching order, followed by any other variable found in the clauses"""
+
+
+def branching_order(engine, symbols):
+    order = list(symbols)
+    known = set(order)
+    order.extend(symbol for symbol in range(1, engine.n_vars + 1) if symbol not in known)
+
+    return order
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""DPLL algorithm over the watched literals engine, recursive method. Watches are not restored when backtracking,
+   only the trail is undone. The constraints of the engine before position j (its clauses, then its at most one
+   constraints) hold whatever the free symbols are, so each call only checks the ones after it, and the search
+   stops as soon as all hold: the symbols still free are set false instead of being branched on, so the recursion
+   is only as deep as the decisions needed. Returns UNKNOWN if budget is exhausted"""
+
+
+def dpll_watched(engine, symbols, i=0, budget=None, j=0):
+    if budget is not None and budget.exhausted(engine.stats):
+        return UNKNOWN
+
+    if engine.propagate() is not None:
+        return False
+
+    # skip the clauses with a true literal, then the at most one constraints (numbered after the clauses) with at
+    # most one literal that is not false, which hold whatever the free symbols are: if all are skipped, the free
+    # symbols are set false
+    values = engine.values
+    clauses = engine.clauses
+    while j < len(clauses):
+        for literal in clauses[j]:
+            if values[abs(literal)] == (literal > 0):
+                break
+        else:
+            break
+        j += 1
+    at_most_one = engine.at_most_one
+    while len(clauses) <= j < len(clauses) + len(at_most_one):
+        open_literals = 0
+        for literal in at_most_one[j - len(clauses)]:
+            if values[abs(literal)] != (literal < 0):  # true or free
+                open_literals += 1
+        if open_literals > 1:
+            break
+        j += 1
+    if j == len(clauses) + len(at_most_one):
+        return {symbol: values[symbol] is True for symbol in range(1, engine.n_vars + 1)}
+
+    # find next unassigned symbol, there is one since a clause is not satisfied yet
+    while values[symbols[i]] is not None:
+        i += 1
+
+    p = symbols[i]
+    level = engine.decision_level()
+    for value in (False, True):
+        engine.new_decision_level()
+        engine.assign(p if value else -p)
+        model = dpll_watched(engine, symbols, i + 1, budget, j)
+        if model is not False:  # model found or budget exhausted
+            return model
+        engine.cancel_until(level)
+
+    return False
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""DPLL algorithm over the watched literals engine, iterative method. A single assignment array and trail are kept,
+   with one marker per decision level, and backtracking undoes the trail down to the level of the last decision
+   that was not flipped yet, so memory stays proportional to the number of variables and no recursion is used.
+   If an occurrence index is given, pure literals are assigned first and never flipped. Returns UNKNOWN if budget
+   is exhausted"""
+
+
+def dpll_trail(engine, symbols, index=None, budget=None):
+    decisions = []  # per decision level, (position in symbols, decided literal, True if it can be flipped)
+    i = 0  # iterator in symbols
+
+    while True:
+        if budget is not None and budget.exhausted(engine.stats):  # checked once per decision or conflict
+            return UNKNOWN
+
+        if engine.propagate() is None:
+            values = engine.values
+
+            # a pure literal cannot falsify any clause, its opposite value needs no search
+            if index is not None:
+                index.update(engine.trail)
+                literal = index.pure_literal(values)
+                if literal is not None:
+                    decisions.append((i, literal, False))
+                    engine.new_decision_level()
+                    engine.assign(literal)
+                    continue
+
+            # find next unassigned symbol, all symbols assigned means all clauses are satisfied
+            while i < len(symbols) and values[symbols[i]] is not None:
+                i += 1
+            if i == len(symbols):
+                return engine.model()
+
+            p = symbols[i]
+            decisions.append((i, -p, True))
+            engine.new_decision_level()
+            engine.assign(-p)
+            continue
+
+        # conflict, backtrack to the most recent decision that was not flipped yet
+        while decisions:
+            i, literal, flippable = decisions.pop()
+            if index is not None:
+                index.backtrack(engine.trail, engine.trail_lim[len(decisions)])
+            engine.cancel_until(len(decisions))
+            if flippable:
+                decisions.append((i, -literal, False))
+                engine.new_decision_level()
+                engine.assign(-literal)
+                break
+        else:
+            return False
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Function that returns the i-th element (starting in 1) of the Luby sequence 1 1 2 1 1 2 4 1 1 2 ..."""
+
+
+def luby(i):
+    while True:
+        k = 1
+        while (1 << k) - 1 < i:  # find the smallest complete subsequence holding element i
+            k += 1
+
+        if i == (1 << k) - 1:
+            return 1 << (k - 1)
+
+        i -= (1 << (k - 1)) - 1  # element i repeats an earlier element of the sequence
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+class LubyRestarts:
+    """Restart policy with the number of conflicts between restarts following the Luby sequence times unit"""
+
+    def __init__(self, unit=100):
+        self.unit = unit  # number of conflicts of the shortest run
+        self.runs = 1  # number of the current run
+        self.conflicts = 0  # conflicts in the current run
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine called after each conflict, with the LBD of the learned clause'''
+
+    def on_conflict(self, lbd):
+        self.conflicts += 1
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that checks if the solver should restart now'''
+
+    def should_restart(self):
+        return self.conflicts >= self.unit * luby(self.runs)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine called when the solver restarts'''
+
+    def on_restart(self):
+        self.runs += 1
+        self.conflicts = 0
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+class GeometricRestarts:
+    """Restart policy with the number of conflicts between restarts growing geometrically"""
+
+    def __init__(self, first=100, factor=1.5):
+        self.limit = first  # number of conflicts of the current run
+        self.factor = factor  # growth of the run length after each restart
+        self.conflicts = 0  # conflicts in the current run
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def on_conflict(self, lbd):
+        self.conflicts += 1
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def should_restart(self):
+        return self.conflicts >= self.limit
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def on_restart(self):
+        self.limit *= self.factor
+        self.conflicts = 0
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+class GlucoseRestarts:
+    """Restart policy used by glucose: restart when the average LBD of the last learned clauses is high compared
+    with the average LBD of all learned clauses, i.e. when the solver is learning poor clauses"""
+
+    def __init__(self, window=50, k=0.8):
+        self.window = window  # number of recent learned clauses in the fast moving average
+        self.k = k  # restart when the fast average times k is above the global average
+        self.recent = deque()  # LBD of the recent learned clauses
+        self.recent_sum = 0  # sum of the LBD in recent
+        self.total_sum = 0  # sum of the LBD of all learned clauses
+        self.total = 0  # number of learned clauses
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def on_conflict(self, lbd):
+
+        self.recent.append(lbd)
+        self.recent_sum += lbd
+        if len(self.recent) > self.window:
+            self.recent_sum -= self.recent.popleft()
+
+        self.total_sum += lbd
+        self.total += 1
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def should_restart(self):
+        return (len(self.recent) == self.window and
+                self.recent_sum * self.k / self.window > self.total_sum / self.total)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def on_restart(self):
+        self.recent.clear()
+        self.recent_sum = 0
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Restart policies available to CDCLSolver, by name"""
+
+RESTARTS = {
+    'luby': LubyRestarts,
+    'geometric': GeometricRestarts,
+    'glucose': GlucoseRestarts,
+}
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+class LearntClause(list):
+    """Learned clause, a list of literals that also keeps its LBD and activity"""
+
+    __slots__ = ('lbd', 'activity')
+
+    def __init__(self, literals, lbd):
+        list.__init__(self, literals)
+        self.lbd = lbd  # literal block distance when learned, lowered if the clause is used with a smaller one
+        self.activity = 0.0  # bumped each time the clause takes part in a conflict
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+class ClauseDB:
+    """Database of learned clauses. Every reduce_interval conflicts (growing by reduce_increment each time) half
+    of the learned clauses are deleted, keeping the ones with the lowest LBD and highest activity, glue clauses
+    (LBD up to glue) and clauses that are currently reasons for an assignment"""
+
+    def __init__(self, reduce_interval=2000, reduce_increment=300, glue=2, decay=0.999):
+        self.learnts = []  # learned clauses
+        self.increment = 1.0  # amount added to the activity of a bumped clause
+        self.decay = decay  # factor applied to all activities after each conflict
+        self.glue = glue  # clauses with LBD up to glue are never deleted
+        self.reduce_interval = reduce_interval  # conflicts between reductions
+        self.reduce_increment = reduce_increment  # growth of reduce_interval after each reduction
+        self.next_reduce = reduce_interval  # number of conflicts of the next reduction
+        self.deleted = 0  # number of learned clauses deleted so far
+        self.history = []  # (conflicts, size before, size after) for each reduction
+        self.literals = 0  # number of literals in the learned clauses
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the number of learned clauses in the database'''
+
+    def __len__(self):
+        return len(self.learnts)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the approximate memory of the learned clauses in bytes: a list slot per literal, plus
+       the list object, its LBD and activity and its two watches per clause'''
+
+    def memory(self):
+        return 8 * self.literals + 120 * len(self.learnts)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that adds a learned clause to the database, returning it'''
+
+    def add(self, literals, lbd):
+
+        clause = LearntClause(literals, lbd)
+        clause.activity = self.increment
+        self.learnts.append(clause)
+        self.literals += len(clause)
+
+        return clause
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that bumps the activity of clause, rescaling all activities if they become too large'''
+
+    def bump(self, clause):
+
+        clause.activity += self.increment
+        if clause.activity > 1e20:
+            for learnt in self.learnts:
+                learnt.activity *= 1e-20
+            self.increment *= 1e-20
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that decays all activities, done by increasing the bump increment instead of touching every clause'''
+
+    def decay_activities(self):
+        self.increment /= self.decay
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that checks if the database should be reduced after conflicts'''
+
+    def should_reduce(self, conflicts):
+        return conflicts >= self.next_reduce
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that deletes half of the deletable learned clauses, the ones with the highest LBD and lowest
+       activity. Clauses that are reasons in the solver are kept. Returns the set with the ids of deleted clauses'''
+
+    def reduce(self, solver, conflicts):
+
+        self.next_reduce = conflicts + self.reduce_interval + self.reduce_increment
+        self.reduce_interval += self.reduce_increment
+
+        reason = solver.reason
+        values = solver.values
+        learnts = self.learnts
+
+        candidates = []
+        kept = []
+        for clause in learnts:
+            symbol = abs(clause[0])
+            locked = reason[symbol] is clause and values[symbol] is not None
+            if locked or clause.lbd <= self.glue:
+                kept.append(clause)
+            else:
+                candidates.append(clause)
+
+        candidates.sort(key=lambda c: (-c.lbd, c.activity))
+        half = len(candidates) // 2
+        removed = set(id(clause) for clause in candidates[:half])
+        kept.extend(candidates[half:])
+
+        self.history.append((conflicts, len(learnts), len(kept)))
+        self.deleted += half
+        self.learnts = kept
+        self.literals = sum(len(clause) for clause in kept)
+
+        return removed
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+class CDCLSolver(Propagator):
+    """Conflict driven clause learning solver, with first UIP learning and non chronological backjumping.
+    heuristic chooses the decisions: 'vsids' (activity based, default) or 'order' (symbols order).
+    restarts chooses the restart policy from RESTARTS, or None to never restart.
+    phase_saving=True assigns decisions the last value the symbol had, instead of always False.
+    reduce_db=True periodically deletes the least useful learned clauses (see ClauseDB).
+    polarity is the value first tried for each symbol: 'false' (default), 'true' or 'random'.
+    phases, if given, is a model (dictionary symbol -> value) whose values are tried first instead of polarity.
+    seed, if given, breaks the ties between symbols at random, so runs with different seeds search differently"""
+
+    def __init__(self, clauses, symbols, heuristic='vsids', restarts='luby', phase_saving=True, reduce_db=True,
+                 polarity='false', seed=None, phases=None):
+        Propagator.__init__(self, clauses, symbols)
+        rng = random.Random(seed)
+
+        self.db = ClauseDB()  # learned clauses
+        self.reduce_db = reduce_db
+        self.conflicts = 0  # number of conflicts found so far
+        self.seen = [False] * (self.n_vars + 1)  # marks used during conflict analysis
+        self.order = branching_order(self, symbols)  # symbols in branching order
+        self.order_pos = 0  # position in order of the next candidate for branching
+        if seed is not None:
+            rng.shuffle(self.order)
+
+        self.vsids = None  # activity based decision heuristic
+        if heuristic == 'vsids':
+            self.vsids = VSIDS(self.order, self.n_vars, rng=rng if seed is not None else None)
+
+        self.restart_policy = RESTARTS[restarts]() if restarts else None
+        self.phase_saving = phase_saving
+        self.phases = [polarity == 'true'] * (self.n_vars + 1)  # value used when branching on each symbol
+        if polarity == 'random':
+            self.phases = [rng.random() < 0.5 for _ in range(self.n_vars + 1)]
+        if phases is not None:
+            for symbol in phases:
+                if symbol <= self.n_vars:
+                    self.phases[symbol] = phases[symbol]
+
+        self.last_model = None  # model found by the last call to solve
+        self.failed = set()  # assumptions that made the last call to solve return False
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that analyzes a conflict, returning the first UIP learned clause (asserting literal in position 0)
+       and the decision level to backjump to'''
+
+    def analyze(self, conflict):
+
+        level = self.level
+        reason = self.reason
+        trail = self.trail
+        seen = self.seen
+        vsids = self.vsids
+        db = self.db
+        current_level = len(self.trail_lim)
+
+        learnt = [None]  # position 0 is reserved for the asserting literal
+        path = 0  # number of literals of the current level still to be resolved
+        p = None
+        index = len(trail) - 1
+        clause = conflict
+
+        while True:
+            if type(clause) is LearntClause:
+                db.bump(clause)
+                if clause.lbd > 2:  # update LBD, the clause may be more useful now
+                    lbd = self.lbd(clause)
+                    if lbd < clause.lbd:
+                        clause.lbd = lbd
+
+            for literal in clause:
+                symbol = abs(literal)
+                if p is not None and symbol == abs(p):
+                    continue
+                if not seen[symbol] and level[symbol] > 0:
+                    seen[symbol] = True
+                    if vsids is not None:
+                        vsids.bump(symbol)
+                    if level[symbol] >= current_level:
+                        path += 1
+                    else:
+                        learnt.append(literal)
+
+            # select next literal of the current level to resolve, walking back in the trail
+            while not seen[abs(trail[index])]:
+                index -= 1
+            p = trail[index]
+            index -= 1
+            clause = reason[abs(p)]
+            seen[abs(p)] = False
+            path -= 1
+
+            if path == 0:  # first unique implication point found
+                break
+
+        learnt[0] = -p
+
+        # minimize the learned clause, removing literals implied by the others
+        marked = [abs(literal) for literal in learnt[1:]]
+        levels = set(level[symbol] for symbol in marked)
+        minimized = [learnt[0]]
+        for literal in learnt[1:]:
+            if reason[abs(literal)] is None or not self.redundant(literal, levels, marked):
+                minimized.append(literal)
+        learnt = minimized
+
+        for symbol in marked:
+            seen[symbol] = False
+
+        # find backjump level, putting the literal with the highest level in position 1
+        if len(learnt) == 1:
+            return learnt, 0
+
+        best = 1
+        for i in range(2, len(learnt)):
+            if level[abs(learnt[i])] > level[abs(learnt[best])]:
+                best = i
+        learnt[1], learnt[best] = learnt[best], learnt[1]
+
+        return learnt, level[abs(learnt[1])]
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that checks if literal of the learned clause is implied by the other literals in it, following
+       its reasons back in the implication graph. Symbols found redundant are marked as seen, and appended to
+       marked so the caller can clear them'''
+
+    def redundant(self, literal, levels, marked):
+
+        level = self.level
+        reason = self.reason
+        seen = self.seen
+
+        stack = [literal]
+        top = len(marked)
+        while stack:
+            clause = reason[abs(stack.pop())]
+            for q in clause[1:]:
+                symbol = abs(q)
+                if not seen[symbol] and level[symbol] > 0:
+                    if reason[symbol] is not None and level[symbol] in levels:
+                        seen[symbol] = True
+                        stack.append(q)
+                        marked.append(symbol)
+                    else:  # reached a decision, or a level not in the learned clause, literal is needed
+                        for symbol in marked[top:]:
+                            seen[symbol] = False
+                        del marked[top:]
+                        return False
+
+        return True
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the literal block distance of clause, i.e. the number of distinct decision levels
+       among its literals'''
+
+    def lbd(self, clause):
+
+        level = self.level
+        return len(set(level[abs(literal)] for literal in clause))
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that records a learned clause, with its LBD, and assigns its asserting literal'''
+
+    def add_learnt(self, learnt, lbd):
+
+        self.stats.learned += 1
+        if len(learnt) == 1:
+            self.assign(learnt[0])
+        else:
+            learnt = self.db.add(learnt, lbd)
+            self.watch(learnt)
+            self.assign(learnt[0], learnt)
+
+            stats = self.stats
+            stats.learnts = len(self.db)
+            if stats.learnts > stats.max_learnts:
+                stats.max_learnts = stats.learnts
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that reduces the learned clauses database, removing the deleted clauses from the watch lists'''
+
+    def reduce_learnts(self):
+
+        removed = self.db.reduce(self, self.conflicts)
+        self.stats.deleted += len(removed)
+        self.stats.learnts = len(self.db)
+        self.stats.reductions.append(self.db.history[-1])
+        if not removed:
+            return
+
+        watches = self.watches
+        for literal in watches:
+            watch_list = watches[literal]
+            watch_list[:] = [clause for clause in watch_list if id(clause) not in removed]
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that chooses the next decision literal, returning None if all symbols are assigned'''
+
+    def pick_branch_literal(self):
+
+        values = self.values
+        if self.vsids is not None:
+            symbol = self.vsids.next_symbol(values)
+        else:
+            order = self.order
+            symbol = None
+            while self.order_pos < len(order):
+                if values[order[self.order_pos]] is None:
+                    symbol = order[self.order_pos]
+                    break
+                self.order_pos += 1
+
+        if symbol is None:
+            return None
+
+        return symbol if self.phases[symbol] else -symbol
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that backjumps to level, undoing all assignments above it'''
+
+    def cancel_until(self, level):
+
+        if len(self.trail_lim) > level:
+            vsids = self.vsids
+            phases = self.phases if self.phase_saving else None
+            for literal in self.trail[self.trail_lim[level]:]:
+                if vsids is not None:
+                    vsids.reinsert(abs(literal))
+                if phases is not None:
+                    phases[abs(literal)] = literal > 0
+
+        Propagator.cancel_until(self, level)
+        self.order_pos = 0
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that adds a clause to the solver, also after a call to solve. The solver goes back to decision
+       level 0 and literals already false at that level are dropped from the clause'''
+
+    def add_clause(self, clause):
+
+        self.cancel_until(0)
+
+        top = max([abs(literal) for literal in clause]) if len(clause) else 0
+        if top > self.n_vars:
+            self.new_symbols(top)
+
+        literals = []
+        for literal in clause:
+            val = self.value(literal)
+            if val is True:  # clause already satisfied at level 0
+                return
+            if val is None:
+                literals.append(literal)
+
+        Propagator.add_clause(self, literals)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that extends the solver to use symbols up to n_vars'''
+
+    def new_symbols(self, n_vars):
+
+        for symbol in range(self.n_vars + 1, n_vars + 1):
+            self.values.append(None)
+            self.level.append(0)
+            self.reason.append(None)
+            self.seen.append(False)
+            self.phases.append(False)
+            self.order.append(symbol)
+            if self.vsids is not None:
+                self.vsids.add_symbol(symbol)
+
+        self.n_vars = n_vars
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that finds the assumptions responsible for literal being false, following its reasons back to the
+       decisions, which are all assumptions'''
+
+    def analyze_final(self, literal):
+
+        failed = {-literal}
+        symbol = abs(literal)
+        if self.level[symbol] == 0:
+            return failed
+
+        trail = self.trail
+        reason = self.reason
+        level = self.level
+        seen = self.seen
+
+        seen[symbol] = True
+        for i in range(len(trail) - 1, self.trail_lim[0] - 1, -1):
+            symbol = abs(trail[i])
+            if not seen[symbol]:
+                continue
+
+            if reason[symbol] is None:  # decision, i.e. an assumption
+                failed.add(trail[i])
+            else:
+                for q in reason[symbol][1:]:
+                    if level[abs(q)] > 0:
+                        seen[abs(q)] = True
+            seen[symbol] = False
+
+        return failed
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that solves the clauses under the assumptions (literals decided before any other symbol), returning
+       a model or False. After the call the model is kept in last_model, the assumptions responsible for a False
+       answer in failed, and learned clauses, heuristic state and statistics are kept for the next call.
+       budget (a Budget) stops the search with UNKNOWN once exhausted, keeping what was learned'''
+
+    def solve(self, assumptions=(), budget=None):
+
+        start = time.time()
+        if budget is not None:
+            budget.start(self.stats)
+        model = self.search(assumptions, budget)
+        self.stats.time += time.time() - start
+
+        return model
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function with the CDCL search loop, see solve'''
+
+    def search(self, assumptions, budget=None):
+
+        self.last_model = None
+        self.failed = set()
+        if self.unsat:
+            return False
+
+        self.cancel_until(0)
+        assumptions = list(assumptions)
+        top = max([abs(literal) for literal in assumptions]) if assumptions else 0
+        if top > self.n_vars:
+            self.new_symbols(top)
+
+        while True:
+            if budget is not None and budget.exhausted(self.stats, self.db.memory()):  # once per decision or conflict
+                self.cancel_until(0)
+                return UNKNOWN
+
+            conflict = self.propagate()
+            if conflict is not None:
+                if self.decision_level() == 0:  # conflict without decisions, problem is unfeasible
+                    self.unsat = True
+                    return False
+
+                self.conflicts += 1
+                learnt, backjump_level = self.analyze(conflict)
+                lbd = self.lbd(learnt)
+                self.cancel_until(backjump_level)
+                self.add_learnt(learnt, lbd)
+                self.db.decay_activities()
+                if self.vsids is not None:
+                    self.vsids.decay_activities()
+
+                if self.reduce_db and self.db.should_reduce(self.conflicts):
+                    self.reduce_learnts()
+
+                policy = self.restart_policy
+                if policy is not None:
+                    policy.on_conflict(lbd)
+                    if policy.should_restart():
+                        self.restart()
+                        if self.unsat:
+                            return False
+
+            else:
+                # decide the assumptions first, one per decision level
+                literal = None
+                while self.decision_level() < len(assumptions):
+                    p = assumptions[self.decision_level()]
+                    val = self.value(p)
+                    if val is None:
+                        literal = p
+                        break
+                    if val is False:  # assumption contradicted by the clauses and the previous assumptions
+                        self.failed = self.analyze_final(-p)
+                        self.cancel_until(0)
+                        return False
+                    self.new_decision_level()  # assumption already true, keep one level per assumption
+
+                if literal is None:
+                    literal = self.pick_branch_literal()
+                    if literal is None:  # all symbols assigned without conflict
+                        self.last_model = self.model()
+                        self.cancel_until(0)
+                        return self.last_model
+
+                self.new_decision_level()
+                self.assign(literal)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that restarts the search, going back to decision level 0'''
+
+    def restart(self):
+
+        self.cancel_until(0)
+        self.restart_policy.on_restart()
+        self.stats.restarts += 1
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the value of literal in the last model found, None if there is none'''
+
+    def model_value(self, literal):
+
+        if self.last_model is None or abs(literal) not in self.last_model:
+            return None
+
+        return self.last_model[abs(literal)] == (literal > 0)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Main CDCL sat solver function, statistics=True returns the search statistics with the model, and budget (a
+   Budget) stops the search with UNKNOWN once exhausted. Horn clauses are detected (horn=True) once the solver is
+   built, so its options are checked and the budget started whatever answers, and solved by horn_sat in linear time;
+   renamable=True also looks for a renaming that makes the clauses Horn, at the cost of a 2-SAT problem as large as
+   the clauses"""
+
+
+def dpll_cdcl(clauses, symbols, statistics=False, budget=None, horn=True, renamable=False, **options):
+    solver = CDCLSolver(clauses, symbols, **options)
+
+    if horn:
+        start = time.time()
+        if budget is not None:
+            budget.start(solver.stats)
+        renaming = horn_renaming(clauses, renamable)
+        if renaming is not None:
+            model = horn_sat(clauses, symbols, renaming)
+            solver.stats.time += time.time() - start
+            return (model, solver.stats) if statistics else model
+
+    model = solver.solve(budget=budget)
+
+    return (model, solver.stats) if statistics else model
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Function that solves 2-SAT clauses (pairs of literals) over symbols 1 to n_vars in linear time, through the
+   strongly connected components of their implication graph. Returns the set of true symbols, or None if a symbol
+   and its negation are in the same component, i.e. the clauses are unsatisfiable"""
+
+
+def two_sat(clauses, n_vars):
+    graph = dict()  # literal -> literals it implies
+    for a, b in clauses:
+        graph.setdefault(-a, []).append(b)
+        graph.setdefault(-b, []).append(a)
+
+    # components come in reverse topological order, a literal is true if its component comes before its negation's
+    component = dict()  # literal -> number of its component
+    components = strongly_connected_components(graph)
+    for number in range(len(components)):
+        for literal in components[number]:
+            component[literal] = number
+
+    true = set()
+    for symbol in range(1, n_vars + 1):
+        if symbol not in component:  # in no clause
+            continue
+        if component[symbol] == component[-symbol]:
+            return None
+        if component[symbol] < component[-symbol]:
+            true.add(symbol)
+
+    return true
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Function that finds the symbols whose literals can be renamed (negated) to make every clause Horn, i.e. with at
+   most one positive literal, and every at most one constraint of a CNF with at most one negative literal (so its
+   binary clauses are Horn). Returns the empty set if the clauses are already Horn, None if they are not and
+   renamable=False (found at the first clause that is not Horn) or no renaming exists. Renaming symbol s makes
+   literal x positive when s is renamed exactly if x < 0, so each clause asks that at most one of its negated
+   literals be true in the renaming; that is written with a ladder of auxiliary symbols as 2-SAT clauses, linear
+   in the size of the clauses, and solved by two_sat"""
+
+
+def horn_renaming(clauses, renamable=False):
+    at_most_one = clauses.at_most_one if isinstance(clauses, CNF) else []
+
+    constraints = []  # per clause or constraint, literals of which at most one can be true in the renaming
+    horn = True
+    n_vars = 0
+    for literals in at_most_one:
+        if sum(1 for literal in literals if literal < 0) > 1:
+            if not renamable:
+                return None
+            horn = False
+        constraints.append(list(literals))
+        for literal in literals:
+            n_vars = max(n_vars, abs(literal))
+
+    # last clauses first, the encodings write their long disjunctions (initial state, goals) at the end, so most
+    # sentences that are not Horn are found at once
+    for index in range(len(clauses) - 1, -1, -1):
+        clause = clauses[index]
+
+        # at most one positive literal (the second largest is negative), Horn whatever its repetitions
+        if not renamable and (len(clause) < 2 or sorted(clause)[-2] < 0):
+            continue
+
+        clause = set(clause)
+        positives = 0
+        for literal in clause:
+            if -literal in clause:  # tautology
+                break
+            if literal > 0:
+                positives += 1
+            n_vars = max(n_vars, abs(literal))
+        else:
+            if positives > 1:
+                if not renamable:
+                    return None
+                horn = False
+            constraints.append([-literal for literal in clause])
+
+    if horn:
+        return set()
+
+    # at most one of x1..xk true: xi implies si, s(i-1) implies si and s(i-1) implies not xi
+    pairs = []
+    auxiliary = n_vars  # last symbol used
+    for literals in constraints:
+        if len(literals) == 2:
+            pairs.append((-literals[0], -literals[1]))
+            continue
+        previous = None
+        for i in range(len(literals)):
+            literal = literals[i]
+            if previous is not None:
+                pairs.append((-previous, -literal))
+            if i < len(literals) - 1:
+                auxiliary += 1
+                pairs.append((-literal, auxiliary))
+                if previous is not None:
+                    pairs.append((-previous, auxiliary))
+                previous = auxiliary
+
+    renaming = two_sat(pairs, auxiliary)
+    if renaming is None:
+        return None
+
+    return set(symbol for symbol in renaming if symbol <= n_vars)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Function with the Dowling-Gallier algorithm, solving Horn clauses in time linear in their size, after negating
+   the literals of the symbols in renaming. All symbols start false; a counter per clause keeps how many of its
+   negative literals are still true, and when it reaches zero the positive literal of the clause becomes true, or
+   the clauses are unsatisfiable if it has none. An at most one constraint (one negative literal at most) fails
+   when two of its positive literals become true, and makes its negative literal false when one does.
+   Returns the least model (with the renaming undone), or False"""
+
+
+def horn_sat(clauses, symbols, renaming=frozenset()):
+    at_most_one = clauses.at_most_one if isinstance(clauses, CNF) else []
+
+    n_vars = max(symbols) if symbols else 0
+    for clause in clauses:
+        for literal in clause:
+            n_vars = max(n_vars, abs(literal))
+    for literals in at_most_one:
+        for literal in literals:
+            n_vars = max(n_vars, abs(literal))
+
+    value = [False] * (n_vars + 1)
+    body = [[] for _ in range(n_vars + 1)]  # symbol -> clauses where it is a negative literal
+    members = [[] for _ in range(n_vars + 1)]  # symbol -> at most one constraints where it is a positive literal
+    count = []  # per clause, negative literals whose symbol is not true yet
+    head = []  # per clause, symbol of its positive literal, 0 if there is none
+    queue = []  # symbols found true, to propagate
+
+    for clause in clauses:
+        clause = set(-literal if abs(literal) in renaming else literal for literal in clause)
+        positive = 0
+        for literal in clause:
+            if -literal in clause:  # tautology
+                break
+            if literal > 0:
+                positive = literal
+        else:
+            index = len(head)
+            head.append(positive)
+            count.append(len(clause) - (1 if positive else 0))
+            for literal in clause:
+                if literal < 0:
+                    body[-literal].append(index)
+            if count[index] == 0:
+                if not positive:  # empty clause
+                    return False
+                queue.append(positive)
+
+    implied = []  # per at most one constraint, symbol of its negative literal, 0 if there is none
+    true_count = []  # per at most one constraint, positive literals already true
+    for literals in at_most_one:
+        index = len(implied)
+        implied.append(0)
+        true_count.append(0)
+        for literal in literals:
+            literal = -literal if abs(literal) in renaming else literal
+            if literal > 0:
+                members[literal].append(index)
+            else:
+                implied[index] = -literal
+
+    while queue:
+        symbol = queue.pop()
+        if value[symbol]:
+            continue
+        value[symbol] = True
+
+        for index in body[symbol]:
+            count[index] -= 1
+            if count[index] == 0:
+                if not head[index]:  # all literals false
+                    return False
+                queue.append(head[index])
+
+        for index in members[symbol]:
+            true_count[index] += 1
+            if true_count[index] > 1:  # two literals true
+                return False
+            if implied[index]:
+                queue.append(implied[index])
+
+    return {symbol: value[symbol] != (symbol in renaming) for symbol in range(1, n_vars + 1)}
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+class LocalSearch:
+    """Stochastic local search over integer clauses: WalkSAT (algorithm='walksat', flipping a symbol of a false
+    clause that breaks the fewest clauses, or a random one with probability noise) or ProbSAT ('probsat', choosing
+    with probability (1 + break) ** -cb). Each clause keeps its number of true literals and the sum of their symbols,
+    which is the critical symbol when only one literal is true, so the break count of every symbol and the list of
+    false clauses are updated by each flip visiting only the clauses of the flipped symbol.
+    At most one constraints are expanded into binary clauses. The search is incomplete: it finds models but cannot
+    prove there is none"""
+
+    def __init__(self, clauses, symbols, algorithm='walksat', noise=0.5, cb=2.3, seed=None):
+        if isinstance(clauses, CNF):
+            clauses = clauses.expanded()
+
+        self.clauses = []  # clauses without repeated literals nor tautologies
+        self.unsat = False  # True if an empty clause was found
+        for clause in clauses:
+            clause = list(set(clause))
+            for literal in clause:
+                if -literal in clause:  # tautology
+                    break
+            else:
+                if not clause:
+                    self.unsat = True
+                else:
+                    self.clauses.append(clause)
+
+        n_vars = max(symbols) if symbols else 0
+        for clause in self.clauses:
+            for literal in clause:
+                if abs(literal) > n_vars:
+                    n_vars = abs(literal)
+
+        self.n_vars = n_vars
+        self.rng = random.Random(seed)
+        self.algorithm = algorithm
+        self.noise = noise  # probability of a random walk step in WalkSAT
+        self.weights = [(1.0 + b) ** -cb for b in range(64)]  # ProbSAT probability of each small break count
+        self.cb = cb
+
+        # literal -> indices of the clauses it occurs in (negative literals use the upper half of the list)
+        self.occurs = [[] for _ in range(2 * n_vars + 1)]
+        for i in range(len(self.clauses)):
+            for literal in self.clauses[i]:
+                self.occurs[literal].append(i)
+
+        self.values = [False] * (n_vars + 1)  # current assignment
+        self.true_count = [0] * len(self.clauses)  # number of true literals of each clause
+        self.true_sum = [0] * len(self.clauses)  # sum of the symbols of the true literals of each clause
+        self.breaks = [0] * (n_vars + 1)  # number of clauses that become false if each symbol is flipped
+        self.false_clauses = []  # indices of the false clauses
+        self.position = [-1] * len(self.clauses)  # position of each clause in false_clauses, -1 if it is true
+
+        self.flips = 0  # number of flips done so far
+        self.tries = 0  # number of random assignments tried so far
+        self.best_values = None  # assignment with the fewest false clauses found so far
+        self.best_false = len(self.clauses) + 1  # number of false clauses of best_values
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that starts from a new assignment, random unless values is given, computing all counts from scratch'''
+
+    def reset(self, values=None):
+
+        if values is None:
+            rng = self.rng
+            values = [rng.random() < 0.5 for _ in range(self.n_vars + 1)]
+        self.values = values = list(values)
+        self.tries += 1
+
+        true_count = self.true_count
+        true_sum = self.true_sum
+        breaks = self.breaks = [0] * (self.n_vars + 1)
+        false_clauses = self.false_clauses = []
+        position = self.position
+
+        for i in range(len(self.clauses)):
+            count, total = 0, 0
+            for literal in self.clauses[i]:
+                if values[abs(literal)] == (literal > 0):
+                    count += 1
+                    total += abs(literal)
+            true_count[i] = count
+            true_sum[i] = total
+            position[i] = -1
+            if count == 0:
+                position[i] = len(false_clauses)
+                false_clauses.append(i)
+            elif count == 1:
+                breaks[total] += 1
+
+        self.keep_best()
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that keeps the current assignment if it has fewer false clauses than the best one found'''
+
+    def keep_best(self):
+
+        if len(self.false_clauses) < self.best_false:
+            self.best_false = len(self.false_clauses)
+            self.best_values = list(self.values)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that flips symbol, updating the counts of the clauses it occurs in'''
+
+    def flip(self, symbol):
+
+        values = self.values
+        true_count = self.true_count
+        true_sum = self.true_sum
+        breaks = self.breaks
+        false_clauses = self.false_clauses
+        position = self.position
+
+        values[symbol] = not values[symbol]
+        true_literal = symbol if values[symbol] else -symbol
+        self.flips += 1
+
+        for i in self.occurs[true_literal]:
+            count = true_count[i] + 1
+            true_count[i] = count
+            true_sum[i] += symbol
+            if count == 1:  # clause became true, symbol is now critical in it
+                last = false_clauses.pop()
+                if last != i:
+                    false_clauses[position[i]] = last
+                    position[last] = position[i]
+                position[i] = -1
+                breaks[symbol] += 1
+            elif count == 2:  # the symbol that was critical is not anymore
+                breaks[true_sum[i] - symbol] -= 1
+
+        for i in self.occurs[-true_literal]:
+            count = true_count[i] - 1
+            true_count[i] = count
+            true_sum[i] -= symbol
+            if count == 0:  # clause became false
+                position[i] = len(false_clauses)
+                false_clauses.append(i)
+                breaks[symbol] -= 1
+            elif count == 1:  # the remaining true symbol became critical
+                breaks[true_sum[i]] += 1
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that chooses the symbol of the false clause to flip'''
+
+    def pick(self, clause):
+
+        breaks = self.breaks
+        rng = self.rng
+
+        if self.algorithm == 'probsat':
+            weights = self.weights
+            scores = []
+            total = 0.0
+            for literal in clause:
+                b = breaks[abs(literal)]
+                total += weights[b] if b < 64 else (1.0 + b) ** -self.cb
+                scores.append(total)
+            r = rng.random() * total
+            for k in range(len(clause)):
+                if r < scores[k]:
+                    return abs(clause[k])
+            return abs(clause[-1])
+
+        # WalkSAT: a flip that breaks nothing is always taken, otherwise random walk or fewest breaks
+        best, best_break = [], None
+        for literal in clause:
+            b = breaks[abs(literal)]
+            if b == 0:
+                return abs(literal)
+            if best_break is None or b < best_break:
+                best, best_break = [abs(literal)], b
+            elif b == best_break:
+                best.append(abs(literal))
+
+        if rng.random() < self.noise:
+            return abs(clause[rng.randrange(len(clause))])
+
+        return best[rng.randrange(len(best))]
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function with the local search loop: up to max_tries assignments, each followed by up to max_flips flips of
+       a symbol of a random false clause. Returns a model, None if none was found, or False if there is an empty
+       clause'''
+
+    def solve(self, max_flips=100000, max_tries=10):
+
+        if self.unsat:
+            return False
+
+        clauses = self.clauses
+        rng = self.rng
+        for _ in range(max_tries):
+            self.reset()
+            false_clauses = self.false_clauses
+            for _ in range(max_flips):
+                if not false_clauses:
+                    return self.model()
+                clause = clauses[false_clauses[rng.randrange(len(false_clauses))]]
+                self.flip(self.pick(clause))
+                if len(false_clauses) < self.best_false:
+                    self.keep_best()
+
+            if not self.false_clauses:
+                return self.model()
+
+        return None
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the current assignment as a model dictionary, or the best one found if best=True'''
+
+    def model(self, best=False):
+
+        values = self.best_values if best else self.values
+        return {symbol: values[symbol] for symbol in range(1, self.n_vars + 1)}
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Local search sat solver function, returning None if no model is found within the flips and tries allowed"""
+
+
+def local_search(clauses, symbols, max_flips=100000, max_tries=10, **options):
+    return LocalSearch(clauses, symbols, **options).solve(max_flips, max_tries)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Hybrid sat solver function: a short local search (max_flips flips) runs first, and if it finds no model its best
+   assignment becomes the initial phase of every symbol in the CDCL solver, which gets the other options.
+   statistics=True returns the CDCL search statistics with the model, empty if the local search found it. A budget
+   option only limits the CDCL search, the local search is already bounded by max_flips"""
+
+
+def dpll_hybrid(clauses, symbols, max_flips=20000, **options):
+    search = LocalSearch(clauses, symbols, seed=options.get('seed'))
+    model = search.solve(max_flips, max_tries=1)
+    if model is not None:  # model found, or empty clause (False)
+        return (model, Statistics()) if options.get('statistics') else model
+
+    return dpll_cdcl(clauses, symbols, phases=search.model(best=True), **options)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Vectorised local search sat solver function, running many walkers at once (see vector_search.py). It is imported
+   when used, so NumPy is only needed by this solver"""
+
+
+def multi_walksat(clauses, symbols, **options):
+    from vector_search import vector_walksat
+    return vector_walksat(clauses, symbols, **options)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Function that returns the indices of the clauses that model does not satisfy (and of the at most one constraints
+   of a CNF with more than one true literal, numbered after the clauses), empty if it is a model. Symbols missing
+   from the model are false. The clauses are checked at once by the vectorised evaluator of vector_search.py, or
+   one by one if NumPy is not installed"""
+
+
+def unsatisfied_clauses(clauses, model):
+    try:
+        from vector_search import ClauseEvaluator
+    except ImportError:
+        ClauseEvaluator = None
+
+    if ClauseEvaluator is not None:
+        return ClauseEvaluator(clauses).unsatisfied(model).tolist()
+
+    at_most_one = clauses.at_most_one if isinstance(clauses, CNF) else []
+    unsatisfied = []
+    i = 0
+    for clause in clauses:
+        for literal in clause:
+            if model.get(abs(literal), False) == (literal > 0):
+                break
+        else:
+            unsatisfied.append(i)
+        i += 1
+
+    for literals in at_most_one:
+        if sum(1 for literal in literals if model.get(abs(literal), False) == (literal > 0)) > 1:
+            unsatisfied.append(i)
+        i += 1
+
+    return unsatisfied
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Sat solvers available to satplan, by name"""
+
+SOLVERS = {
+    'recursive': dpll_recursive,
+    'iterative': dpll_iterative,
+    'watched': lambda clauses, symbols, **options: dpll_recursive(clauses, symbols, watched=True, **options),
+    'trail': lambda clauses, symbols, **options: dpll_iterative(clauses, symbols, watched=True, **options),
+    'trail-pure': lambda clauses, symbols, **options: dpll_iterative(clauses, symbols, watched=True, pure=True,
+                                                                     **options),
+    'cdcl': dpll_cdcl,
+    'cdcl-order': lambda clauses, symbols, **options: dpll_cdcl(clauses, symbols, heuristic='order', **options),
+    'walksat': local_search,
+    'probsat': lambda clauses, symbols, **options: local_search(clauses, symbols, algorithm='probsat', **options),
+    'walkers': multi_walksat,
+    'hybrid': dpll_hybrid,
+    'horn': lambda clauses, symbols, **options: dpll_cdcl(clauses, symbols, renamable=True, **options),
+}
@@ -0,0 +1,124 @@
+"""File with the compact representation of a sentence in conjunctive normal form"""
+from array import array
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+class CNF:
+    """Sentence in CNF stored as one flat buffer of integer literals plus the offset where each clause starts,
+    instead of a list of small lists. Clause i is literals[offsets[i]:offsets[i + 1]].
+    At most one constraints are kept apart, in at_most_one, instead of one binary clause per pair of literals"""
+
+    def __init__(self, clauses=()):
+        self.literals = array('i')  # literals of all clauses, one clause after the other
+        self.offsets = array('i', [0])  # start of each clause in literals, plus the end of the last one
+        self.at_most_one = []  # at most one constraints, as arrays of literals of which at most one can be true
+
+        self.extend(clauses)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that adds a clause at the end of the sentence'''
+
+    def append(self, clause):
+        self.literals.extend(clause)
+        self.offsets.append(len(self.literals))
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that adds several clauses at the end of the sentence'''
+
+    def extend(self, clauses):
+        for clause in clauses:
+            self.append(clause)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that adds the constraint that at most one of literals is true'''
+
+    def add_at_most_one(self, literals):
+        self.at_most_one.append(array('i', literals))
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that adds the constraint that exactly one of literals is true, i.e. at most one plus the clause
+       saying at least one is'''
+
+    def add_exactly_one(self, literals):
+        self.add_at_most_one(literals)
+        self.append(literals)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the number of clauses in the sentence, not counting the at most one constraints'''
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns clause i, as an array of literals'''
+
+    def __getitem__(self, i):
+
+        if i < 0:
+            i += len(self.offsets) - 1
+        if not 0 <= i < len(self.offsets) - 1:
+            raise IndexError('clause index out of range')
+
+        return self.literals[self.offsets[i]:self.offsets[i + 1]]
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that iterates over the clauses, as arrays of literals'''
+
+    def __iter__(self):
+
+        literals = self.literals
+        offsets = self.offsets
+        for i in range(len(offsets) - 1):
+            yield literals[offsets[i]:offsets[i + 1]]
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the highest symbol used in the sentence'''
+
+    def max_symbol(self):
+
+        top = 0
+        for literals in [self.literals] + self.at_most_one:
+            if literals:
+                top = max(top, max(literals), -min(literals))
+
+        return top
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that iterates over the clauses followed by the binary clauses equivalent to the at most one
+       constraints, for code that only handles clauses'''
+
+    def expanded(self):
+
+        for clause in self:
+            yield clause
+
+        for literals in self.at_most_one:
+            for i in range(len(literals)):
+                for j in range(i + 1, len(literals)):
+                    yield array('i', [-literals[i], -literals[j]])
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the number of clauses given by expanded'''
+
+    def expanded_len(self):
+        return len(self) + sum(len(literals) * (len(literals) - 1) // 2 for literals in self.at_most_one)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the sentence as a list of lists, for code that needs to change the clauses. The at
+       most one constraints are expanded into binary clauses'''
+
+    def to_lists(self):
+        return [clause.tolist() for clause in self.expanded()]
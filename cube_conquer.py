@@ -0,0 +1,266 @@
+"""File with the cube and conquer sat solver: a lookahead phase splits the problem in cubes (conjunctions of
+literals) that are then solved in parallel processes by the CDCL solver"""
+import multiprocessing
+import queue
+import time
+import traceback
+
+from DPLL import CDCLSolver, Propagator
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Function that splits the clauses in cubes by lookahead over the candidate symbols (all symbols by default).
+   At each node the symbol with the most propagations on both branches is chosen; branches that fail are pruned
+   and their negation added to the cube. Splitting stops when another level would exceed max_cubes cubes.
+   Returns the list of cubes, empty if lookahead refuted the whole problem"""
+
+
+def lookahead_cubes(clauses, symbols, candidates=None, max_cubes=1000, preselect=30):
+    engine = Propagator(clauses, symbols)
+    if engine.unsat or engine.propagate() is not None:
+        return []
+
+    # candidates that appear in the clauses, most frequent first
+    counts = [0] * (engine.n_vars + 1)
+    for clause in engine.clauses:
+        for literal in clause:
+            counts[abs(literal)] += 1
+    if candidates is None:
+        candidates = symbols
+    candidates = sorted((s for s in set(candidates) if counts[s] > 0), key=lambda s: -counts[s])
+
+    frontier = [[]]  # cubes of the current level
+    cubes = []  # cubes that cannot be split further
+    while frontier:
+        if len(cubes) + 2 * len(frontier) > max_cubes:  # splitting again would give too many cubes
+            cubes.extend(frontier)
+            break
+
+        next_frontier = []
+        for cube in frontier:
+            symbol = split_cube(engine, cube, candidates, preselect)  # cube may get forced literals
+            if symbol is None:  # cube refuted by lookahead
+                continue
+            if symbol == 0:  # nothing left to split on
+                cubes.append(cube)
+            else:
+                next_frontier.append(cube + [symbol])
+                next_frontier.append(cube + [-symbol])
+
+        frontier = next_frontier
+
+    return cubes
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Function that chooses the symbol to split cube on, by looking ahead at both values of the preselect most
+   frequent unassigned candidates. Literals whose negation fails are appended to cube. Returns the symbol, 0 if no
+   candidate is left, or None if cube is refuted"""
+
+
+def split_cube(engine, cube, candidates, preselect):
+    engine.cancel_until(0)
+    engine.new_decision_level()
+    for literal in cube:
+        if not engine.assign(literal):
+            return None
+    if engine.propagate() is not None:
+        return None
+
+    values = engine.values
+    best, best_score = 0, -1
+    checked = 0
+    for symbol in candidates:
+        if checked == preselect:
+            break
+        if values[symbol] is not None:
+            continue
+        checked += 1
+
+        base = len(engine.trail)
+        sizes = []
+        for literal in (symbol, -symbol):
+            engine.new_decision_level()
+            engine.assign(literal)
+            conflict = engine.propagate()
+            sizes.append(None if conflict is not None else len(engine.trail) - base)
+            engine.cancel_until(1)
+
+        if sizes[0] is None and sizes[1] is None:  # both values fail
+            return None
+
+        if sizes[0] is None or sizes[1] is None:  # failed literal, the other value is forced
+            forced = -symbol if sizes[0] is None else symbol
+            cube.append(forced)
+            engine.assign(forced)
+            if engine.propagate() is not None:
+                return None
+            continue
+
+        score = sizes[0] * sizes[1] + sizes[0] + sizes[1]
+        if score > best_score:
+            best, best_score = symbol, score
+
+    return best
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Routine run by each worker process: takes cubes from tasks until it gets None, solving each one as assumptions
+   of the same incremental CDCL solver, and puts (cube index, worker, model or False, statistics, unsat) in results,
+   unsat being True when the clauses were found unsatisfiable whatever the cube. If the worker fails it puts
+   (None, worker, traceback) instead and stops"""
+
+
+def cube_worker(clauses, symbols, worker, options, tasks, results):
+    try:
+        solver = CDCLSolver(clauses, symbols, **options)
+
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+
+            index, cube = task
+            start = time.time()
+            conflicts = solver.conflicts
+            model = solver.solve(cube)
+            statistics = {'time': time.time() - start, 'conflicts': solver.conflicts - conflicts}
+            results.put((index, worker, model, statistics, solver.unsat))
+
+            if solver.unsat:  # unsatisfiable without assumptions, no other cube can be satisfied
+                break
+
+    except Exception:
+        results.put((None, worker, traceback.format_exc()))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+class CubeAndConquer:
+    """Cube and conquer solver. Cubes are put in a shared queue, so idle workers keep taking the remaining cubes
+    until one of them is satisfiable or all are refuted. After solve, statistics has one entry per cube solved"""
+
+    def __init__(self, clauses, symbols, candidates=None, workers=None, max_cubes=1000, **options):
+        self.clauses = clauses
+        self.symbols = symbols
+        self.candidates = candidates  # symbols used to build the cubes, e.g. the actions
+        self.workers = workers if workers is not None else multiprocessing.cpu_count()
+        self.max_cubes = max_cubes
+        self.options = options  # options for the CDCL solver of each worker
+        self.cubes = []  # cubes found by lookahead
+        self.statistics = []  # per cube: cube, worker, result, time and conflicts
+        self.lookahead_time = 0.0  # time spent building the cubes
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that splits and solves the problem, returning the model of the first satisfiable cube, or False
+       if all cubes are unsatisfiable'''
+
+    def solve(self):
+
+        start = time.time()
+        self.cubes = lookahead_cubes(self.clauses, self.symbols, self.candidates, self.max_cubes)
+        self.lookahead_time = time.time() - start
+        if not self.cubes:
+            return False
+
+        tasks = multiprocessing.Queue()
+        results = multiprocessing.Queue()
+        for index in range(len(self.cubes)):
+            tasks.put((index, self.cubes[index]))
+        for _ in range(self.workers):
+            tasks.put(None)  # one stop mark per worker
+
+        processes = []
+        for worker in range(self.workers):
+            process = multiprocessing.Process(target=cube_worker,
+                                              args=(self.clauses, self.symbols, worker, self.options, tasks, results))
+            process.daemon = True
+            process.start()
+            processes.append(process)
+
+        model = False
+        try:
+            for _ in range(len(self.cubes)):
+                index, worker, cube_model, statistics, unsat = self.receive(results, processes)
+                statistics.update({'cube': self.cubes[index], 'worker': worker,
+                                   'result': 'SAT' if cube_model is not False else 'UNSAT'})
+                self.statistics.append(statistics)
+
+                if cube_model is not False:  # first satisfiable cube, stop
+                    model = cube_model
+                    break
+                if unsat:  # the remaining cubes are unsatisfiable too
+                    break
+
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            for process in processes:
+                process.join()
+            for channel in (tasks, results):
+                channel.cancel_join_thread()
+                channel.close()
+
+        return model
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the next answer put in results by the worker processes, waiting at most poll seconds
+       at a time so that workers are checked in between. Raises RuntimeError if a worker failed or died, e.g. killed
+       when out of memory, since the answer of its cube would never come, or if all stopped with cubes unanswered'''
+
+    def receive(self, results, processes, poll=0.1):
+
+        while True:
+            try:
+                message = results.get(timeout=poll)
+            except queue.Empty:
+                alive = False
+                for worker in range(len(processes)):
+                    exitcode = processes[worker].exitcode
+                    if exitcode is None:
+                        alive = True
+                    elif exitcode != 0:
+                        raise RuntimeError('cube worker %d died with exit code %d' % (worker, exitcode))
+                if not alive and results.empty():  # answers of dead workers are already in the queue
+                    raise RuntimeError('cube workers stopped with cubes left unanswered')
+                continue
+
+            if message[0] is None:
+                raise RuntimeError('cube worker %d failed:\n%s' % (message[1], message[2]))
+
+            return message
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that prints the statistics of the cubes solved'''
+
+    def report(self):
+
+        print('Lookahead: %d cubes in %.3f [s]' % (len(self.cubes), self.lookahead_time))
+        for statistics in self.statistics:
+            print('cube %s: %s by worker %d, %d conflicts, %.3f [s]' %
+                  (statistics['cube'], statistics['result'], statistics['worker'], statistics['conflicts'],
+                   statistics['time']))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Main cube and conquer sat solver function, report=True prints the statistics of each cube"""
+
+
+def dpll_cube_conquer(clauses, symbols, report=False, **options):
+    solver = CubeAndConquer(clauses, symbols, **options)
+    model = solver.solve()
+    if report:
+        solver.report()
+
+    return model
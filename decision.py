@@ -0,0 +1,300 @@
+"""File with the decision heuristics used by the sat solvers"""
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+class ActivityHeap:
+    """Indexed binary max heap of symbols, ordered by their activity"""
+
+    def __init__(self, activity):
+        self.activity = activity  # activity of each symbol, shared with the heuristic
+        self.heap = []  # symbols in heap order
+        self.indices = [-1] * len(activity)  # position of each symbol in heap, -1 if not in heap
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that checks if symbol is in the heap'''
+
+    def __contains__(self, symbol):
+        return self.indices[symbol] >= 0
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the number of symbols in the heap'''
+
+    def __len__(self):
+        return len(self.heap)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that inserts symbol in the heap, if it is not there yet'''
+
+    def insert(self, symbol):
+
+        if self.indices[symbol] >= 0:
+            return
+
+        self.indices[symbol] = len(self.heap)
+        self.heap.append(symbol)
+        self.sift_up(len(self.heap) - 1)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that removes and returns the symbol with the highest activity'''
+
+    def pop(self):
+
+        heap = self.heap
+        top = heap[0]
+        last = heap.pop()
+        self.indices[top] = -1
+
+        if heap:
+            heap[0] = last
+            self.indices[last] = 0
+            self.sift_down(0)
+
+        return top
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that restores the heap order after the activity of symbol was increased'''
+
+    def increase(self, symbol):
+
+        if self.indices[symbol] >= 0:
+            self.sift_up(self.indices[symbol])
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that moves the symbol in position i up the heap, while its parent has a lower activity'''
+
+    def sift_up(self, i):
+
+        heap = self.heap
+        indices = self.indices
+        activity = self.activity
+
+        symbol = heap[i]
+        act = activity[symbol]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if activity[heap[parent]] >= act:
+                break
+            heap[i] = heap[parent]
+            indices[heap[i]] = i
+            i = parent
+
+        heap[i] = symbol
+        indices[symbol] = i
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that moves the symbol in position i down the heap, while a child has a higher activity'''
+
+    def sift_down(self, i):
+
+        heap = self.heap
+        indices = self.indices
+        activity = self.activity
+
+        size = len(heap)
+        symbol = heap[i]
+        act = activity[symbol]
+        while True:
+            child = 2 * i + 1
+            if child >= size:
+                break
+            if child + 1 < size and activity[heap[child + 1]] > activity[heap[child]]:
+                child += 1
+            if activity[heap[child]] <= act:
+                break
+            heap[i] = heap[child]
+            indices[heap[i]] = i
+            i = child
+
+        heap[i] = symbol
+        indices[symbol] = i
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+class VSIDS:
+    """Variable state independent decaying sum heuristic: symbols involved in recent conflicts are chosen first.
+    If a random generator rng is given, symbols start with a tiny random activity to break ties"""
+
+    def __init__(self, symbols, n_vars, decay=0.95, rng=None):
+        self.activity = [0.0] * (n_vars + 1)  # activity of each symbol
+        if rng is not None:
+            self.activity = [rng.random() * 1e-5 for _ in range(n_vars + 1)]
+        self.increment = 1.0  # amount added to the activity of a bumped symbol
+        self.decay = decay  # factor applied to all activities after each conflict
+        self.heap = ActivityHeap(self.activity)  # unassigned symbols, ordered by activity
+
+        for symbol in symbols:
+            self.heap.insert(symbol)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that adds a new symbol to the heuristic'''
+
+    def add_symbol(self, symbol):
+
+        self.activity.append(0.0)
+        self.heap.indices.append(-1)
+        self.heap.insert(symbol)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that bumps the activity of symbol, rescaling all activities if they become too large'''
+
+    def bump(self, symbol):
+
+        activity = self.activity
+        activity[symbol] += self.increment
+
+        if activity[symbol] > 1e100:
+            for i in range(len(activity)):
+                activity[i] *= 1e-100
+            self.increment *= 1e-100
+
+        self.heap.increase(symbol)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that decays all activities, done by increasing the bump increment instead of touching every symbol'''
+
+    def decay_activities(self):
+        self.increment /= self.decay
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that makes symbol available for branching again, called when it is unassigned'''
+
+    def reinsert(self, symbol):
+        self.heap.insert(symbol)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the unassigned symbol with the highest activity, or None if all are assigned'''
+
+    def next_symbol(self, values):
+
+        heap = self.heap
+        while len(heap):
+            symbol = heap.pop()
+            if values[symbol] is None:
+                return symbol
+
+        return None
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+class OccurrenceIndex:
+    """Literal -> clause occurrence index, with the number of unsatisfied clauses each literal occurs in. The counts
+    are updated as literals are assigned and unassigned, so pure literals are found without scanning the clauses.
+    The literals of at most one constraints count as occurring negated forever, so they are never made true"""
+
+    def __init__(self, clauses, n_vars, at_most_one=()):
+        self.clauses = clauses  # clauses indexed, their literals are only read
+        self.occurs = [[] for _ in range(2 * n_vars + 1)]  # literal -> indices of the clauses it occurs in
+        self.count = [0] * (2 * n_vars + 1)  # literal -> number of unsatisfied clauses it occurs in
+        self.true_count = [0] * len(clauses)  # number of true literals of each clause, 0 if unsatisfied
+        self.head = 0  # position in the trail of the next literal to assign
+        # (lists are indexed by the literal, negative literals use the upper half through negative indices)
+
+        occurs = self.occurs
+        count = self.count
+        for i in range(len(clauses)):
+            for literal in clauses[i]:
+                occurs[literal].append(i)
+                count[literal] += 1
+        for literals in at_most_one:
+            for literal in literals:
+                count[-literal] += 1
+
+        # symbols that may be pure, checked when popped
+        self.candidates = [symbol for symbol in range(n_vars, 0, -1) if count[symbol] == 0 or count[-symbol] == 0]
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that makes literal true, removing the clauses it satisfies from the counts'''
+
+    def assign(self, literal):
+
+        clauses = self.clauses
+        count = self.count
+        true_count = self.true_count
+        candidates = self.candidates
+
+        for i in self.occurs[literal]:
+            true_count[i] += 1
+            if true_count[i] == 1:  # clause became satisfied
+                for other in clauses[i]:
+                    count[other] -= 1
+                    if count[other] == 0:
+                        candidates.append(abs(other))
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that unassigns literal, adding back to the counts the clauses only it satisfied'''
+
+    def unassign(self, literal):
+
+        clauses = self.clauses
+        count = self.count
+        true_count = self.true_count
+
+        for i in self.occurs[literal]:
+            true_count[i] -= 1
+            if true_count[i] == 0:  # clause became unsatisfied
+                for other in clauses[i]:
+                    count[other] += 1
+
+        symbol = abs(literal)
+        if count[symbol] == 0 or count[-symbol] == 0:  # may be pure again
+            self.candidates.append(symbol)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that assigns the literals added to trail since the last update'''
+
+    def update(self, trail):
+
+        while self.head < len(trail):
+            self.assign(trail[self.head])
+            self.head += 1
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that unassigns the literals of trail after position mark, before they are undone'''
+
+    def backtrack(self, trail, mark):
+
+        while self.head > mark:
+            self.head -= 1
+            self.unassign(trail[self.head])
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns an unassigned pure literal, that occurs in unsatisfied clauses with only one sign, or
+       None if there is none. Symbols that no longer occur in unsatisfied clauses are returned as false literals'''
+
+    def pure_literal(self, values):
+
+        count = self.count
+        candidates = self.candidates
+        while candidates:
+            symbol = candidates.pop()
+            if values[symbol] is not None:
+                continue
+            if count[-symbol] == 0:
+                return symbol if count[symbol] else -symbol
+            if count[symbol] == 0:
+                return -symbol
+
+        return None
@@ -191,15 +191,24 @@ A, B, C, D, E, F, G, P, Q, x, y, z = map(Expr, 'ABCDEFGPQxyz')
 # ______________________________________________________________________________
 
 
-def tt_entails(kb, alpha):
+def tt_entails(kb, alpha, compiled=True):
     """Does kb entail the sentence alpha? Use truth tables. For propositional
     kb's and sentences. [Figure 7.10]. Note that the 'kb' should be an
-    Expr which is a conjunction of clauses.
+    Expr which is a conjunction of clauses. With compiled=True the sentences
+    are compiled to bit-vector operations that check many models at once
+    (see tt_compile); the answer is the same as with compiled=False.
     >>> tt_entails(expr('P & Q'), expr('Q'))
     True
+    >>> tt_entails(expr('P | Q'), expr('Q'), compiled=False)
+    False
     """
     assert not variables(alpha)
-    return tt_check_all(kb, alpha, prop_symbols(kb & alpha), {})
+    symbols = prop_symbols(kb & alpha)
+    if compiled:
+        program = tt_compile([kb, alpha], symbols)
+        if program is not None:
+            return tt_check_compiled(program, len(symbols))
+    return tt_check_all(kb, alpha, symbols, {})
 
 
 def tt_check_all(kb, alpha, symbols, model):
@@ -217,6 +226,96 @@ def tt_check_all(kb, alpha, symbols, model):
                 tt_check_all(kb, alpha, rest, extend(model, P, False)))
 
 
+def tt_compile(sentences, symbols):
+    """Compile propositional sentences into a flat program over bit-vectors,
+    each bit the value of a subexpression in one model. Registers
+    0..len(symbols)-1 hold the symbols, and each instruction
+    (op, target, sources) computes one subexpression; repeated subexpressions
+    are computed once. Return the instructions and the register of each
+    sentence, or None if a sentence has an operator pl_true does not know.
+    >>> tt_compile([expr('P & ~P')], [P])
+    ([('~', 1, (0,)), ('&', 2, (0, 1))], [2])
+    """
+    registers = {symbol: i for i, symbol in enumerate(symbols)}
+    instructions = []
+
+    def compile_sentence(exp):
+        if exp is True or exp is False:
+            key = ('const', exp)
+            if key not in registers:
+                registers[key] = len(registers)
+                instructions.append((key, registers[key], ()))
+            return registers[key]
+        if not isinstance(exp, Expr):
+            return None
+        if exp in registers:
+            return registers[exp]
+        op, args = exp.op, exp.args
+        if is_prop_symbol(op) or op not in ('~', '&', '|', '==>', '<==', '<=>', '^'):
+            return None
+        if op not in ('&', '|') and len(args) != (1 if op == '~' else 2):
+            return None
+        sources = []
+        for arg in args:
+            source = compile_sentence(arg)
+            if source is None:
+                return None
+            sources.append(source)
+        registers[exp] = len(registers)
+        instructions.append((op, registers[exp], tuple(sources)))
+        return registers[exp]
+
+    outputs = [compile_sentence(s) for s in sentences]
+    if None in outputs:
+        return None
+    return instructions, outputs
+
+
+def tt_check_compiled(program, n, block_size=12):
+    """Auxiliary routine of tt_entails for a program compiled by tt_compile
+    from [kb, alpha] over n symbols. The 2**n models are checked in blocks
+    of 2**block_size models, one bit each in a Python int: the first
+    block_size symbols take every combination inside the block, the others
+    are fixed per block. Stop at the first model of kb that is not a model
+    of alpha."""
+    instructions, (kb, alpha) = program
+    inner = min(n, block_size)
+    mask = (1 << (1 << inner)) - 1
+    registers = [0] * (n + len(instructions))
+    # symbol i < inner alternates every 2**i models: 2**i zeros, 2**i ones
+    for i in range(inner):
+        period = 1 << i
+        registers[i] = mask // ((1 << 2 * period) - 1) * (((1 << period) - 1) << period)
+    for block in range(1 << (n - inner)):
+        for i in range(inner, n):
+            registers[i] = mask if block >> (i - inner) & 1 else 0
+        for op, target, sources in instructions:
+            if op == '~':
+                value = registers[sources[0]] ^ mask
+            elif op == '&':
+                value = mask
+                for source in sources:
+                    value &= registers[source]
+            elif op == '|':
+                value = 0
+                for source in sources:
+                    value |= registers[source]
+            elif op == '==>':
+                value = (registers[sources[0]] ^ mask) | registers[sources[1]]
+            elif op == '<==':
+                value = registers[sources[0]] | (registers[sources[1]] ^ mask)
+            elif op == '<=>':
+                value = registers[sources[0]] ^ registers[sources[1]] ^ mask
+            elif op == '^':
+                value = registers[sources[0]] ^ registers[sources[1]]
+            else:  # constant
+                value = mask if op[1] else 0
+            registers[target] = value
+        if registers[kb] & (registers[alpha] ^ mask):
+            return False
+    return True
+
+
 def prop_symbols(x):
     "Return a list of all propositional symbols in x."
     if not isinstance(x, Expr):
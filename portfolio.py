@@ -0,0 +1,163 @@
+"""File with the portfolio sat solver, racing several CDCL configurations in parallel processes"""
+import multiprocessing
+import queue
+import traceback
+
+from DPLL import CDCLSolver
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Solver configurations raced by the portfolio, worker i uses configuration i (cycling) with seed i"""
+
+CONFIGURATIONS = [
+    {'heuristic': 'vsids', 'restarts': 'luby', 'polarity': 'false'},
+    {'heuristic': 'vsids', 'restarts': 'glucose', 'polarity': 'true'},
+    {'heuristic': 'vsids', 'restarts': 'geometric', 'polarity': 'random'},
+    {'heuristic': 'vsids', 'restarts': 'glucose', 'polarity': 'false'},
+    {'heuristic': 'vsids', 'restarts': 'luby', 'polarity': 'random'},
+    {'heuristic': 'order', 'restarts': 'luby', 'polarity': 'false'},
+    {'heuristic': 'vsids', 'restarts': None, 'polarity': 'true'},
+    {'heuristic': 'vsids', 'restarts': 'geometric', 'polarity': 'false', 'phase_saving': False},
+]
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+class SharingSolver(CDCLSolver):
+    """CDCL solver that sends its short learned clauses to the other workers, and adds the clauses received from
+    them at each restart"""
+
+    def __init__(self, clauses, symbols, worker, inboxes, max_length=8, **options):
+        CDCLSolver.__init__(self, clauses, symbols, **options)
+
+        self.worker = worker  # number of this worker
+        self.inboxes = inboxes  # queues of learned clauses, one per worker
+        self.max_length = max_length  # longest learned clause that is shared
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that records a learned clause, sending it to the other workers if it is short'''
+
+    def add_learnt(self, learnt, lbd):
+
+        CDCLSolver.add_learnt(self, learnt, lbd)
+
+        if len(learnt) <= self.max_length:
+            clause = list(learnt)
+            for i in range(len(self.inboxes)):
+                if i != self.worker:
+                    self.inboxes[i].put(clause)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that restarts the search, adding the clauses learned by the other workers meanwhile'''
+
+    def restart(self):
+
+        CDCLSolver.restart(self)
+
+        inbox = self.inboxes[self.worker]
+        while not self.unsat:
+            try:
+                clause = inbox.get_nowait()
+            except queue.Empty:
+                break
+            self.add_clause(clause)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Routine run by each worker process, putting (worker, model or False, None) in results, or (worker, None,
+   traceback) if it fails"""
+
+
+def portfolio_worker(clauses, symbols, worker, options, inboxes, results):
+    try:
+        if inboxes is None:
+            solver = CDCLSolver(clauses, symbols, **options)
+        else:
+            solver = SharingSolver(clauses, symbols, worker, inboxes, **options)
+
+        results.put((worker, solver.solve(), None))
+
+    except Exception:
+        results.put((worker, None, traceback.format_exc()))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Function that returns the first answer put in results by the worker processes, waiting at most poll seconds at
+   a time so that workers are checked in between. A failed worker does not stop the others, but once every
+   worker failed or died (e.g. killed when out of memory) without an answer, RuntimeError is raised"""
+
+
+def first_answer(results, processes, poll=0.1):
+    errors = []  # tracebacks of the failed workers
+    while True:
+        try:
+            worker, model, error = results.get(timeout=poll)
+        except queue.Empty:
+            # answers of dead workers are already in the queue
+            if any(process.is_alive() for process in processes) or not results.empty():
+                continue
+            raise RuntimeError('all %d portfolio workers failed, exit codes %s%s' %
+                               (len(processes), [process.exitcode for process in processes],
+                                ''.join('\n' + error for error in errors[:1])))
+
+        if error is None:
+            return model
+        errors.append(error)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Function that returns the options of the solver used by worker"""
+
+
+def worker_options(worker):
+    options = dict(CONFIGURATIONS[worker % len(CONFIGURATIONS)])
+    options['seed'] = worker
+
+    return options
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Main portfolio sat solver function: runs workers processes (one per core by default) on the same clauses with
+   different configurations, returning the answer of the first one to finish and stopping the others.
+   share=True makes the workers exchange their short learned clauses"""
+
+
+def dpll_portfolio(clauses, symbols, workers=None, share=False):
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    results = multiprocessing.Queue()
+    inboxes = [multiprocessing.Queue() for _ in range(workers)] if share else None
+
+    processes = []
+    for worker in range(workers):
+        process = multiprocessing.Process(target=portfolio_worker,
+                                          args=(clauses, symbols, worker, worker_options(worker), inboxes, results))
+        process.daemon = True
+        process.start()
+        processes.append(process)
+
+    try:
+        model = first_answer(results, processes)  # first answer wins, SAT or UNSAT
+    finally:
+        # cancel the remaining workers
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join()
+
+        for channel in [results] + (inboxes or []):
+            channel.cancel_join_thread()
+            channel.close()
+
+    return model
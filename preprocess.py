@@ -0,0 +1,474 @@
+"""File with the CNF preprocessing done before calling the sat solver"""
+from collections import deque
+
+from cnf import CNF
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+class Preprocessor:
+    """SatELite style preprocessor: equivalent literal substitution, failed literals, subsumption, self subsuming
+    resolution, bounded variable elimination and blocked clause elimination. Clauses removed by elimination are kept
+    in a stack, used to extend the model found for the simplified sentence into a model of the original one.
+    Symbols in frozen are never eliminated, nor are the symbols of the at most one constraints of a CNF, which are
+    passed unchanged to the simplified sentence"""
+
+    def __init__(self, clauses, frozen=(), max_resolvent=20, max_occurrences=40):
+        self.clauses = []  # clauses as sets of literals, None for removed clauses
+        self.occurs = dict()  # literal -> ids of the clauses with it
+        self.frozen = set(frozen)  # symbols that must stay in the sentence
+        self.max_resolvent = max_resolvent  # longest resolvent accepted when eliminating a symbol
+        self.max_occurrences = max_occurrences  # symbols with more occurrences of either sign are not eliminated
+        self.eliminated = set()  # eliminated symbols
+        self.stack = []  # (witness literal, clause) removed by elimination, in removal order
+        self.queue = deque()  # ids of the clauses to check for subsumption
+        self.queued = set()  # ids of the clauses in queue
+        self.unsat = False  # True if the empty clause was derived
+
+        self.original_clauses = 0  # number of clauses before simplification
+        self.subsumed = 0  # clauses removed by subsumption
+        self.strengthened = 0  # literals removed by self subsuming resolution
+        self.blocked = 0  # clauses removed by blocked clause elimination
+        self.substituted = 0  # symbols replaced by an equivalent literal
+        self.failed = 0  # failed literals found
+        self.resolved = 0  # symbols removed by bounded variable elimination
+
+        # at most one constraints are not resolved upon, their symbols must stay
+        self.at_most_one = list(clauses.at_most_one) if isinstance(clauses, CNF) else []
+        for literals in self.at_most_one:
+            self.frozen.update(abs(literal) for literal in literals)
+
+        for clause in clauses:
+            self.original_clauses += 1
+            clause = set(clause)
+            for literal in clause:
+                if -literal in clause:  # tautology
+                    break
+            else:
+                self.add(clause)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that adds a clause to the sentence, returning its id'''
+
+    def add(self, clause):
+
+        if not clause:
+            self.unsat = True
+
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        for literal in clause:
+            self.occurs.setdefault(literal, set()).add(index)
+        self.enqueue(index)
+
+        return index
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that removes clause index from the sentence'''
+
+    def remove(self, index):
+
+        for literal in self.clauses[index]:
+            self.occurs[literal].discard(index)
+        self.clauses[index] = None
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that adds clause index to the subsumption queue'''
+
+    def enqueue(self, index):
+
+        if index not in self.queued:
+            self.queued.add(index)
+            self.queue.append(index)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the number of clauses with literal'''
+
+    def count(self, literal):
+
+        occurs = self.occurs.get(literal)
+        return len(occurs) if occurs else 0
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that uses clause index to remove the clauses it subsumes, and to strengthen the clauses it
+       subsumes after negating one of its literals (self subsuming resolution)'''
+
+    def backward_subsume(self, index):
+
+        clauses = self.clauses
+        clause = clauses[index]
+        occurs = self.occurs
+
+        # subsumption, only the clauses with the least frequent literal of clause are candidates
+        best = min(clause, key=self.count)
+        for other in list(occurs.get(best, ())):
+            if other != index and len(clauses[other]) >= len(clause) and clause <= clauses[other]:
+                self.remove(other)
+                self.subsumed += 1
+
+        # self subsuming resolution, clause with literal negated subsumes other, so -literal can be removed
+        for literal in clause:
+            rest = clause - {literal}
+            for other in list(occurs.get(-literal, ())):
+                other_clause = clauses[other]
+                if len(other_clause) >= len(clause) and rest <= other_clause:
+                    other_clause.discard(-literal)
+                    occurs[-literal].discard(other)
+                    self.strengthened += 1
+                    if not other_clause:
+                        self.unsat = True
+                    self.enqueue(other)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that empties the subsumption queue'''
+
+    def subsume_queue(self):
+
+        queue = self.queue
+        while queue and not self.unsat:
+            index = queue.popleft()
+            self.queued.discard(index)
+            if self.clauses[index] is not None:
+                self.backward_subsume(index)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that tries to eliminate symbol by replacing the clauses with it by all their non tautological
+       resolvents, as long as this does not increase the number of clauses. Returns True if it was eliminated'''
+
+    def eliminate(self, symbol):
+
+        clauses = self.clauses
+        positive = list(self.occurs.get(symbol, ()))
+        negative = list(self.occurs.get(-symbol, ()))
+        if len(positive) > self.max_occurrences or len(negative) > self.max_occurrences:
+            return False
+
+        limit = len(positive) + len(negative)
+        resolvents = []
+        for i in positive:
+            pos_rest = clauses[i] - {symbol}
+            for j in negative:
+                resolvent = None
+                neg_rest = clauses[j] - {-symbol}
+                for literal in neg_rest:
+                    if -literal in pos_rest:  # tautology
+                        break
+                else:
+                    resolvent = pos_rest | neg_rest
+
+                if resolvent is not None:
+                    if len(resolvent) > self.max_resolvent:
+                        return False
+                    resolvents.append(resolvent)
+                    if len(resolvents) > limit:
+                        return False
+
+        # eliminate symbol, saving its clauses to extend the model later
+        for i in positive:
+            self.stack.append((symbol, sorted(clauses[i])))
+            self.remove(i)
+        for j in negative:
+            self.stack.append((-symbol, sorted(clauses[j])))
+            self.remove(j)
+        self.eliminated.add(symbol)
+        self.resolved += 1
+
+        for resolvent in resolvents:
+            self.add(resolvent)
+
+        return True
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that runs bounded variable elimination over all symbols, cheapest first, returning the number of
+       symbols eliminated'''
+
+    def eliminate_all(self):
+
+        symbols = set(abs(literal) for literal in self.occurs if self.occurs[literal])
+        candidates = [symbol for symbol in symbols if symbol not in self.frozen and symbol not in self.eliminated]
+        candidates.sort(key=lambda s: self.count(s) * self.count(-s))
+
+        eliminated = 0
+        for symbol in candidates:
+            if self.unsat:
+                break
+            if self.eliminate(symbol):
+                eliminated += 1
+                self.subsume_queue()
+
+        return eliminated
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that removes blocked clauses: a clause is blocked on one of its literals if all resolvents on that
+       literal are tautologies'''
+
+    def eliminate_blocked(self):
+
+        clauses = self.clauses
+        occurs = self.occurs
+        for index in range(len(clauses)):
+            clause = clauses[index]
+            if clause is None:
+                continue
+
+            for literal in clause:
+                if abs(literal) in self.frozen:
+                    continue
+
+                for other in occurs.get(-literal, ()):
+                    for q in clauses[other]:
+                        if q != -literal and -q in clause:  # tautological resolvent
+                            break
+                    else:
+                        break  # resolvent is not a tautology, clause is not blocked on literal
+                else:
+                    self.stack.append((literal, sorted(clause)))
+                    self.remove(index)
+                    self.blocked += 1
+                    break
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that builds the binary implication graph: each binary clause (a or b) gives the implications
+       -a -> b and -b -> a'''
+
+    def implication_graph(self):
+
+        graph = dict()  # literal -> literals it implies
+        for clause in self.clauses:
+            if clause is not None and len(clause) == 2:
+                a, b = clause
+                graph.setdefault(-a, []).append(b)
+                graph.setdefault(-b, []).append(a)
+
+        return graph
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that looks for failed literals: a literal that implies its own negation through the binary
+       implication graph must be false. Every literal of the graph is probed, the ones without incoming
+       implications first (any literal they reach that fails makes them fail too), and probing stops after
+       visiting budget times the size of the graph. Returns the literals found to be true'''
+
+    def failed_literals(self, graph, budget=10):
+
+        implied_by_others = set()
+        for literals in graph.values():
+            implied_by_others.update(literals)
+
+        units = []
+        work = budget * (len(graph) + len(implied_by_others))  # maximum number of visits
+        roots = [literal for literal in graph if literal not in implied_by_others]
+        for root in roots + [literal for literal in graph if literal in implied_by_others]:
+            if work <= 0:
+                break
+
+            visited = {root}
+            stack = [root]
+            while stack:
+                literal = stack.pop()
+                for implied in graph.get(literal, ()):
+                    if implied not in visited:
+                        visited.add(implied)
+                        stack.append(implied)
+
+            work -= len(visited)
+            if -root in visited:
+                units.append(-root)
+
+        return units
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that finds the equivalent literals (strongly connected components of the binary implication graph),
+       replacing each class by one representative literal, and adds failed literals as units. The equivalences are
+       kept in the elimination stack to rebuild the model. Returns the number of symbols removed'''
+
+    def substitute_equivalences(self):
+
+        graph = self.implication_graph()
+
+        for literal in self.failed_literals(graph):
+            self.failed += 1
+            self.add({literal})
+
+        # choose one representative per class, frozen symbols first, then the lowest symbol
+        substitute = dict()  # symbol -> literal replacing it
+        for component in strongly_connected_components(graph):
+            if len(component) < 2:
+                continue
+
+            symbols = set(abs(literal) for literal in component)
+            if len(symbols) < len(component):  # literal equivalent to its negation
+                self.add(set())
+                return 0
+
+            representative = min(component, key=lambda l: (abs(l) not in self.frozen, abs(l)))
+            for literal in component:
+                symbol = abs(literal)
+                if symbol != abs(representative) and symbol not in self.frozen:
+                    substitute[symbol] = representative if literal > 0 else -representative
+
+        if not substitute:
+            return 0
+
+        # rewrite the clauses with substituted symbols
+        clauses = self.clauses
+        for index in range(len(clauses)):
+            clause = clauses[index]
+            if clause is None:
+                continue
+            for literal in clause:
+                if abs(literal) in substitute:
+                    break
+            else:
+                continue
+
+            new_clause = set()
+            for literal in clause:
+                symbol = abs(literal)
+                if symbol in substitute:
+                    literal = substitute[symbol] if literal > 0 else -substitute[symbol]
+                new_clause.add(literal)
+
+            self.remove(index)
+            for literal in new_clause:
+                if -literal in new_clause:  # tautology
+                    break
+            else:
+                self.add(new_clause)
+
+        for symbol in substitute:
+            representative = substitute[symbol]
+            self.stack.append((symbol, [symbol, -representative]))
+            self.stack.append((-symbol, [-symbol, representative]))
+            self.eliminated.add(symbol)
+
+        self.substituted += len(substitute)
+        return len(substitute)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that simplifies the sentence, returning the simplified clauses in a CNF'''
+
+    def simplify(self):
+
+        self.subsume_queue()
+        if not self.unsat and self.substitute_equivalences():
+            self.subsume_queue()
+        while not self.unsat and self.eliminate_all():
+            pass
+        if not self.unsat:
+            self.eliminate_blocked()
+
+        if self.unsat:
+            return CNF([[]])
+
+        sentence = CNF(sorted(clause) for clause in self.clauses if clause is not None)
+        sentence.at_most_one = self.at_most_one
+        return sentence
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that extends a model of the simplified sentence into a model of the original sentence, going back
+       through the removed clauses and making their witness literal true whenever they are not satisfied'''
+
+    def extend_model(self, model):
+
+        for literal, clause in reversed(self.stack):
+            for q in clause:
+                if model.get(abs(q), False) == (q > 0):
+                    break
+            else:
+                model[abs(literal)] = literal > 0
+
+        return model
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the counters of the simplification as a dictionary, e.g. to report them with the
+       statistics of the search: clauses before and after (the empty clause alone if the sentence was refuted),
+       symbols removed (by elimination or substitution) and the counters of each technique'''
+
+    def as_dict(self):
+
+        return {
+            'unsat': self.unsat,
+            'clauses_before': self.original_clauses,
+            'clauses_after': 1 if self.unsat else sum(1 for clause in self.clauses if clause is not None),
+            'symbols_removed': len(self.eliminated),
+            'resolved': self.resolved,
+            'substituted': self.substituted,
+            'failed': self.failed,
+            'subsumed': self.subsumed,
+            'strengthened': self.strengthened,
+            'blocked': self.blocked,
+        }
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Function that returns the strongly connected components of a graph (dictionary node -> successors), with
+   Tarjan's algorithm in linear time. Implemented with an explicit stack, so deep graphs do not hit the recursion
+   limit"""
+
+
+def strongly_connected_components(graph):
+    index = dict()  # order in which each node was visited
+    low = dict()  # lowest index reachable from each node
+    stack = []  # visited nodes not yet assigned to a component
+    on_stack = set()
+    components = []
+
+    for root in graph:
+        if root in index:
+            continue
+
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph[root]))]
+
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if successor not in index:  # visit successor, resuming node afterwards
+                    index[successor] = low[successor] = len(index)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(graph.get(successor, ()))))
+                    break
+                elif successor in on_stack:
+                    low[node] = min(low[node], index[successor])
+
+            else:  # all successors visited
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+
+                if low[node] == index[node]:  # node is the root of a component
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+    return components
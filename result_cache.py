@@ -0,0 +1,170 @@
+"""File with the persistent result cache of the sat solvers: answers are kept on disk, one file per CNF, under a hash
+of its canonical form, so solving the same sentence again only reads the file"""
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zlib
+
+from cnf import CNF
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Function that returns the hexadecimal SHA-256 hash of the canonical form of a CNF and its symbols: each clause
+   (and at most one constraint) with its literals sorted and without repetitions, the clauses sorted and without
+   repetitions, so the order in which the encoding wrote them does not change the hash"""
+
+
+def canonical_hash(clauses, symbols):
+    at_most_one = clauses.at_most_one if isinstance(clauses, CNF) else []
+
+    digest = hashlib.sha256()
+    digest.update(('s %s\n' % ' '.join(str(symbol) for symbol in sorted(set(symbols)))).encode('ascii'))
+    for kind, constraints in (('c', clauses), ('a', at_most_one)):
+        for constraint in sorted(set(tuple(sorted(set(constraint))) for constraint in constraints)):
+            digest.update(('%s %s\n' % (kind, ' '.join(str(literal) for literal in constraint))).encode('ascii'))
+
+    return digest.hexdigest()
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Function that encodes a model as text: a bitset of the assigned symbols followed by a bitset of their values,
+   compressed with zlib and written in base64"""
+
+
+def encode_model(model, n_vars):
+    size = (n_vars >> 3) + 1
+    bits = bytearray(2 * size)
+    for symbol in model:
+        bits[symbol >> 3] |= 1 << (symbol & 7)
+        if model[symbol]:
+            bits[size + (symbol >> 3)] |= 1 << (symbol & 7)
+
+    return base64.b64encode(zlib.compress(bytes(bits))).decode('ascii')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Function that decodes a model written by encode_model"""
+
+
+def decode_model(text, n_vars):
+    bits = bytearray(zlib.decompress(base64.b64decode(text.encode('ascii'))))
+    size = (n_vars >> 3) + 1
+
+    return {symbol: bool(bits[size + (symbol >> 3)] & (1 << (symbol & 7))) for symbol in range(1, n_vars + 1)
+            if bits[symbol >> 3] & (1 << (symbol & 7))}
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+class ResultCache:
+    """On disk cache of sat answers, one JSON file per CNF in directory, named by canonical_hash. A file keeps the
+    answer (a model as compressed bitsets, or UNSAT) and the statistics of the search, if given. Reading an entry
+    updates the modification time of its file, so when there are more than max_entries files or they take more than
+    max_bytes, the least recently used ones are deleted. Files are written to a temporary name and then renamed,
+    so processes sharing the directory never read a partial entry"""
+
+    def __init__(self, directory, max_entries=1000, max_bytes=64 << 20):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the path of the file of key'''
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the cached (model or False, statistics dictionary or None) of key, or None if it is
+       not in the cache. Unreadable entries count as missing'''
+
+    def get(self, key):
+
+        path = self.path(key)
+        try:
+            with open(path, 'r') as fh:
+                entry = json.load(fh)
+            model = False
+            if entry['result'] == 'SAT':
+                model = decode_model(entry['model'], entry['n_vars'])
+            os.utime(path, None)  # most recently used
+        except (OSError, ValueError, KeyError, zlib.error):
+            return None
+
+        return model, entry.get('statistics')
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that stores the answer of key, a model (empty if no symbol is needed) or False, with its statistics
+       (a dictionary), then evicts the least recently used entries if the cache is too large. UNKNOWN answers of a
+       search stopped by its budget are not stored'''
+
+    def put(self, key, model, statistics=None):
+
+        if model is None:  # UNKNOWN, a later search may decide it
+            return
+
+        entry = {'result': 'UNSAT' if model is False else 'SAT', 'statistics': statistics, 'created': time.time()}
+        if model is not False:
+            entry['n_vars'] = max(model) if model else 0
+            entry['model'] = encode_model(model, entry['n_vars'])
+
+        handle, temporary = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        with os.fdopen(handle, 'w') as fh:
+            json.dump(entry, fh)
+        os.replace(temporary, self.path(key))
+
+        self.evict()
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that deletes the least recently used entries until there are at most max_entries, taking at most
+       max_bytes'''
+
+    def evict(self):
+
+        entries = []  # (last use, size, path) of each entry
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                path = os.path.join(self.directory, name)
+                try:
+                    status = os.stat(path)
+                except OSError:  # deleted by another process
+                    continue
+                entries.append((status.st_mtime, status.st_size, path))
+
+        entries.sort()  # least recently used first
+        count = len(entries)
+        total = sum(size for last_use, size, path in entries)
+        for last_use, size, path in entries:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:  # already deleted by another process
+                pass
+            count -= 1
+            total -= size
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that deletes every entry of the cache'''
+
+    def clear(self):
+
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                os.remove(os.path.join(self.directory, name))
@@ -1,6 +1,8 @@
 import copy
 import time
 
+from cnf import CNF
+
 
 # TODO: Complete or conflict exclusion, if impossible action are removed then only complete should be applied
 # ----------------------------------------------------------------------------------------------------------------------
@@ -191,7 +193,7 @@ class SATInstance:
                     continue
 
             # replace variable by constants
-            for constant in constants:
+            for constant in sorted(constants):  # fixed order, so variables are numbered the same in every run
 
                 # initialize temporary variables
                 temp_action = [action, copy.deepcopy(action_table[action])]
@@ -358,7 +360,7 @@ class SATInstance:
 
     def encoding(self, h):  # h represents the time horizon
 
-        sentence = []
+        sentence = CNF()  # clauses are kept in a flat integer buffer
 
         # part 1 of linear encoding, in accordance with the handout
         sentence.extend(self.initial_state)
@@ -406,6 +408,7 @@ class SATInstance:
 
     def del_implications(self, sentence):
 
+        added = set(tuple(clause) for clause in sentence)  # clauses already in sentence
         action_table = self.action_table
         for action_var in action_table:
 
@@ -417,13 +420,15 @@ class SATInstance:
             for precond in action[0]:  # adding clauses with preconditions
                 clause = [-action_var, precond]
 
-                if clause not in sentence:  # add clause if necessary
+                if tuple(clause) not in added:  # add clause if necessary
+                    added.add(tuple(clause))
                     sentence.append(clause)
 
             for effect in action[1]:  # adding clauses with effects
                 clause = [-action_var, effect]
 
-                if clause not in sentence:  # add clause if necessary
+                if tuple(clause) not in added:  # add clause if necessary
+                    added.add(tuple(clause))
                     sentence.append(clause)
 
         return sentence
@@ -463,12 +468,8 @@ class SATInstance:
                 if variables[action][1] == t:
                     temp_actions.append(action)
 
-            # build and add at max one constraint
-            for i in range(0, len(temp_actions)):
-                for j in range(i + 1, len(temp_actions)):
-                    # create new clause and add to SAT sentence
-                    clause = [-temp_actions[i], -temp_actions[j]]
-                    sentence.append(clause)
+            # add at max one constraint, solved natively instead of one clause per pair of actions
+            sentence.add_at_most_one(temp_actions)
 
         return sentence
 
@@ -560,7 +561,7 @@ class SATInstance:
 
         # create variable list (ground atoms in hebrand base plus all ground actions)
         variables = len(self.variables) - 1  # number of variables
-        clauses = len(sentence)  # number of clauses (size of sentence)
+        clauses = sentence.expanded_len()  # number of clauses, at max one constraints written as clauses
 
         # write problem line
         f.write(('p cnf \t %d \t %d \n' % (variables, clauses)))
@@ -569,19 +570,11 @@ class SATInstance:
         f.write('c \n')
         f.write('c \n')
 
-        output = ''
         # write clauses
-        for clause in sentence:
-
-            string = ''
-            for atom in clause:
-                string = ' '.join((string, str(atom)))
-
-            # add clause to output
-            output = ''.join((output, string[1:] + ' 0\n'))
+        for clause in sentence.expanded():
+            f.write(' '.join([str(atom) for atom in clause]) + ' 0\n')
 
-        # write output and close file
-        f.write(output)
+        # close file
         f.close()
 
         return
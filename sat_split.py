@@ -1,6 +1,8 @@
 import copy
 import time
 
+from cnf import CNF
+
 
 # TODO: Complete or conflict exclusion, if impossible action are removed then only complete should be applied
 # ----------------------------------------------------------------------------------------------------------------------
@@ -207,7 +209,7 @@ class SATInstance:
                     continue
 
             # replace variable by constants
-            for constant in constants:
+            for constant in sorted(constants):  # fixed order, so variables are numbered the same in every run
 
                 # initialize temporary variables
                 temp_action = [action, copy.deepcopy(action_table[action])]
@@ -395,7 +397,7 @@ class SATInstance:
 
     def encoding(self, h):  # h represents the time horizon
 
-        sentence = []
+        sentence = CNF()  # clauses are kept in a flat integer buffer
 
         # part 1 of linear encoding, in accordance with the handout
         sentence.extend(self.initial_state)
@@ -443,6 +445,7 @@ class SATInstance:
 
     def del_implications(self, sentence):
 
+        added = set(tuple(clause) for clause in sentence)  # clauses already in sentence
         action_table = self.action_table
         for action_var in action_table:
 
@@ -457,7 +460,8 @@ class SATInstance:
                 clause.append(precond)
 
                 clause = sorted(clause)
-                if clause not in sentence:  # add clause if necessary
+                if tuple(clause) not in added:  # add clause if necessary
+                    added.add(tuple(clause))
                     sentence.append(clause)
 
             for effect in action[1]:  # adding clauses with effects
@@ -465,7 +469,8 @@ class SATInstance:
                 clause.append(effect)
 
                 clause = sorted(clause)
-                if clause not in sentence:  # add clause if necessary
+                if tuple(clause) not in added:  # add clause if necessary
+                    added.add(tuple(clause))
                     sentence.append(clause)
 
         return sentence
@@ -654,19 +659,11 @@ class SATInstance:
         f.write('c \n')
         f.write('c \n')
 
-        output = ''
         # write clauses
         for clause in sentence:
+            f.write(' '.join([str(atom) for atom in clause]) + ' 0\n')
 
-            string = ''
-            for atom in clause:
-                string = ' '.join((string, str(atom)))
-
-            # add clause to output
-            output = ''.join((output, string[1:] + ' 0\n'))
-
-        # write output and close file
-        f.write(output)
+        # close file
         f.close()
 
         return
@@ -1,54 +1,283 @@
+import json
+import multiprocessing
 import sys
+import traceback
+from multiprocessing.connection import wait
 
 from DPLL import *
+from cube_conquer import dpll_cube_conquer
+from portfolio import dpll_portfolio
+from preprocess import Preprocessor
+from result_cache import ResultCache, canonical_hash
 from sat_explan import *
 
 
-def main(arg1):
+# sat solvers that run in several processes, by name
+PARALLEL_SOLVERS = {
+    'portfolio': dpll_portfolio,
+    'cube': dpll_cube_conquer,
+}
+
+# sat solvers that can return the statistics of their search
+STATISTICS_SOLVERS = ('watched', 'trail', 'trail-pure', 'cdcl', 'cdcl-order', 'hybrid', 'horn')
+
+# sat solvers that can be stopped by a budget
+BUDGET_SOLVERS = ('watched', 'trail', 'trail-pure', 'cdcl', 'cdcl-order', 'hybrid', 'horn')
+
+# sat solvers that cannot search a preprocessed sentence, the backtracking of the legacy iterative search breaks on it
+UNPREPROCESSED_SOLVERS = ('iterative',)
+
+
+def main(arg1, solver='cdcl', preprocess=None, parallel=1, horizon_time=None, cache_dir=None, **options):
     # Read the command line arguments
     filename = arg1
 
     # initialization of variables
     model = False
-    write_sat_sentence = True  # write DIMACS file
     h_max = 3  # max time horizon
 
+    # by default the sentence is simplified for every solver that can search it
+    if preprocess is None:
+        preprocess = solver not in UNPREPROCESSED_SOLVERS
+
+    # time slice of the sat solver in each horizon, horizons left undecided are skipped
+    if horizon_time is not None:
+        options = dict(options, budget=Budget(max_time=horizon_time))
+
+    # answers of previous runs, kept on disk
+    cache = ResultCache(cache_dir) if cache_dir is not None else None
+
     start_time = time.clock()
-    for h in range(0, h_max):
+    if parallel > 1:  # several time horizons solved at once
+        sat, model, undecided = parallel_horizons(filename, h_max, parallel, solver, preprocess, options, start_time,
+                                                  cache)
 
-        # Create SAT instance(constructor)
-        sat = SATInstance()
+    else:
+        undecided = []  # horizons left UNKNOWN, by the budget or by a local search solver that gave up
+        for h in range(0, h_max):
+            sat, model = solve_horizon(filename, h, solver, preprocess, options, start_time, cache)
 
-        # Read information from .dat file
-        sat.read_file(filename, h)
+            if model is not False and model is not UNKNOWN:  # model found, an empty one if preprocessing solved it
+                break
+            if model is UNKNOWN:
+                undecided.append(h)
 
-        # Ground all the actions
-        sat.ground_actions(h)
+    if model is not False and model is not UNKNOWN:
+        sat.write_solution(model)  # write solution to terminal
+    else:  # problem is unfeasible
+        print('Sentence not satisfied, maximum solver iterations reached')
 
-        # Linear encoding
-        cnf = sat.encoding(h)
+    if undecided:  # a shorter plan may exist in these horizons
+        if options.get('budget') is not None:
+            cause = 'within the budget'
+        else:  # only local search solvers give up without a budget, they cannot prove there is no plan
+            cause = 'by the %s solver, an incomplete local search' % solver
+        print('Horizons not decided %s: %s' % (cause, ', '.join(str(h) for h in undecided)))
 
-        # Write SAT sentence to file using DIMACS syntax
-        if write_sat_sentence:
-            sat.write_dimacs(cnf, filename, start_time, h)
+    print('Elapsed time: %.6f [s]' % (time.clock() - start_time))
 
-        # get symbols used in sat sentence
-        symbols = [i for i in range(1, len(sat.variables))]
 
-        # Run SAT solver
-        model = dpll_recursive(cnf, symbols)
-        # model = dpll_iterative(cnf, symbols)
+# ----------------------------------------------------------------------------------------------------------------------
 
-        if model:  # model found
-            sat.write_solution(model)  # write solution to terminal
-            break
+"""Function that encodes and solves the problem for time horizon h, returning the SAT instance and the model found
+   (False if there is none, UNKNOWN if the budget option, a Budget, stopped the search or a local search solver
+   gave up). The option statistics='text' or 'json' prints the statistics of the search. With a ResultCache, a
+   sentence solved before is not solved again, and the answers found are added to the cache. Every model is checked
+   against the sentence, so a wrong one never reaches write_solution"""
 
-    if not model:  # problem is unfeasible
-        print('Sentence not satisfied, maximum solver iterations reached')
 
-    print('Elapsed time: %.6f [s]' % (time.clock() - start_time))
+def solve_horizon(filename, h, solver, preprocess, options, start_time, cache=None):
+    write_sat_sentence = True  # write DIMACS file
+
+    # statistics of the search, asked to the sat solver
+    report = options.get('statistics')
+    if report:
+        if solver not in STATISTICS_SOLVERS:
+            raise ValueError('%s solver does not keep statistics' % solver)
+        options = dict(options, statistics=True)
+    if options.get('budget') is not None and solver not in BUDGET_SOLVERS:
+        raise ValueError('%s solver cannot be stopped by a budget' % solver)
+    if preprocess and solver in UNPREPROCESSED_SOLVERS:
+        raise ValueError('%s solver cannot search a preprocessed sentence' % solver)
+
+    # sat solver, options are passed to it
+    sat_solver = PARALLEL_SOLVERS[solver] if solver in PARALLEL_SOLVERS else SOLVERS[solver]
+
+    # Create SAT instance(constructor)
+    sat = SATInstance()
+
+    # Read information from .dat file
+    sat.read_file(filename, h)
+
+    # Ground all the actions
+    sat.ground_actions(h)
+
+    # Linear encoding
+    cnf = sat.encoding(h)
+
+    # get symbols used in sat sentence
+    symbols = [i for i in range(1, len(sat.variables))]
+
+    # answer of a previous run with the same sentence
+    if cache is not None:
+        key = canonical_hash(cnf, symbols)
+        cached = cache.get(key)
+        # wrong entries are solved again
+        if cached is not None and (cached[0] is False or not unsatisfied_clauses(cnf, cached[0])):
+            model, statistics = cached
+            if report and statistics is not None:
+                print_statistics(h, model, Statistics.from_dict(statistics), report)
+            return sat, model
+
+    # Write SAT sentence to file using DIMACS syntax
+    if write_sat_sentence:
+        sat.write_dimacs(cnf, filename, start_time, h)
+
+    # cubes are built over the actions
+    if solver == 'cube':
+        options = dict(options, candidates=[i for i in symbols if sat.variables[i][0] not in sat.hebrand])
+
+    # Simplify SAT sentence, keeping what is needed to rebuild the model of the original sentence
+    simplified = cnf
+    if preprocess:
+        preprocessor = Preprocessor(cnf)
+        simplified = preprocessor.simplify()
+
+    # Run SAT solver
+    model = sat_solver(simplified, symbols, **options)
+    if report:
+        model, statistics = model
+        print_statistics(h, model, statistics, report, preprocessor.as_dict() if preprocess else None)
+
+    # a model, empty if preprocessing left no clause, is extended and checked against every clause of the sentence
+    satisfied = model is not False and model is not UNKNOWN
+    if satisfied and preprocess:
+        model = preprocessor.extend_model(model)
+
+    if satisfied:
+        unsatisfied = unsatisfied_clauses(cnf, model)
+        if unsatisfied:
+            raise RuntimeError('model of horizon %d does not satisfy the constraints %s of the sentence' %
+                               (h, unsatisfied[:10]))
+
+    if cache is not None and model is not UNKNOWN:
+        cache.put(key, model, statistics.as_dict() if report else None)
+
+    return sat, model
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Routine that prints the statistics of the search for time horizon h, as text or as a JSON line, with the
+   counters of the preprocessing (a dictionary from Preprocessor.as_dict) if given"""
+
+
+def print_statistics(h, model, statistics, report, preprocessing=None):
+    if report == 'json':
+        satisfiable = None if model is UNKNOWN else model is not False
+        print(json.dumps(dict(statistics.as_dict(), horizon=h, satisfiable=satisfiable, preprocessing=preprocessing)))
+    else:
+        result = 'UNKNOWN' if model is UNKNOWN else 'UNSAT' if model is False else 'SAT'
+        print('Horizon %d (%s): %s' % (h, result, statistics))
+        if statistics.reductions:  # size of the learned clause database over time
+            print('  learned clause database: %s' % ', '.join('%d -> %d at %d conflicts' % (before, after, conflicts)
+                                                             for conflicts, before, after in statistics.reductions))
+        if preprocessing is not None:
+            print('  preprocessing%s: %d -> %d clauses, %d symbols removed (%d eliminated, %d substituted), '
+                  '%d failed literals, %d subsumed, %d strengthened, %d blocked' %
+                  (' (refuted)' if preprocessing['unsat'] else '', preprocessing['clauses_before'],
+                   preprocessing['clauses_after'], preprocessing['symbols_removed'], preprocessing['resolved'],
+                   preprocessing['substituted'], preprocessing['failed'], preprocessing['subsumed'],
+                   preprocessing['strengthened'], preprocessing['blocked']))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Routine run by each time horizon process, sending (SAT instance, model, None) through its pipe connection, or
+   (None, None, traceback) if solving the horizon failed"""
+
+
+def horizon_worker(filename, h, solver, preprocess, options, start_time, cache, connection):
+    try:
+        sat, model = solve_horizon(filename, h, solver, preprocess, options, start_time, cache)
+        connection.send((sat, model, None))
+    except Exception:
+        connection.send((None, None, traceback.format_exc()))
+    connection.close()
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Function that solves up to parallel time horizons at once, one process each (Rintanen's algorithm A): when a
+   horizon is found unsatisfiable the next one is started, and when one is found satisfiable all the longer ones are
+   cancelled. Returns the SAT instance and model of the shortest satisfiable horizon, once all the shorter ones
+   are known to be unsatisfiable or were left UNKNOWN, and the list of the latter"""
+
+
+def parallel_horizons(filename, h_max, parallel, solver, preprocess, options, start_time, cache=None):
+    if solver in PARALLEL_SOLVERS:  # horizon processes are daemonic and cannot start the solver workers
+        raise ValueError('%s solver cannot be used with parallel time horizons' % solver)
+
+    running = dict()  # time horizon -> (process solving it, connection to receive its answer)
+    best = (h_max, None, False)  # shortest satisfiable horizon found, with its SAT instance and model
+    h_next = 0  # next time horizon to start
+    undecided = []  # horizons left UNKNOWN, by the budget or by a local search solver that gave up
+
+    try:
+        while True:
+            # keep parallel horizons running, never beyond the best one
+            while len(running) < parallel and h_next < best[0]:
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                process = multiprocessing.Process(target=horizon_worker,
+                                                  args=(filename, h_next, solver, preprocess, options, start_time,
+                                                        cache, sender))
+                process.daemon = True
+                process.start()
+                sender.close()  # only the worker sends
+                running[h_next] = (process, receiver)
+                h_next += 1
+
+            if not running:  # all horizons shorter than the best one are unsatisfiable
+                break
+
+            # wait for any horizon to finish
+            finished = wait([receiver for process, receiver in running.values()])
+            for h in sorted(h for h in running if running[h][1] in finished):
+                if h not in running:  # cancelled by a shorter horizon finished at the same time
+                    continue
+                process, receiver = running.pop(h)
+                try:
+                    sat, model, error = receiver.recv()
+                except EOFError:  # pipe closed without an answer, the worker died (e.g. killed when out of memory)
+                    process.join()
+                    raise RuntimeError('time horizon %d worker died with exit code %s' % (h, process.exitcode))
+                finally:
+                    receiver.close()
+                process.join()
+
+                if error is not None:
+                    raise RuntimeError('time horizon %d failed:\n%s' % (h, error))
+
+                if model is UNKNOWN:
+                    undecided.append(h)
+                # cancel longer horizons, their plans would be longer
+                if model is not False and model is not UNKNOWN and h < best[0]:
+                    best = (h, sat, model)
+                    for h_long in [h_long for h_long in running if h_long > h]:
+                        process, receiver = running.pop(h_long)
+                        process.terminate()
+                        process.join()
+                        receiver.close()
+
+    finally:
+        for process, receiver in running.values():
+            process.terminate()
+            process.join()
+            receiver.close()
+
+    return best[1], best[2], sorted(h for h in undecided if h < best[0])
 
 
 # To read the command line arguments
 if __name__ == '__main__':
-    sys.exit(main(sys.argv[1]))
+    sys.exit(main(*sys.argv[1:3]))
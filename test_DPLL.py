@@ -0,0 +1,31 @@
+"""Tests of the CDCL solver entry point, dpll_cdcl"""
+import pytest
+
+import DPLL
+from cnf import CNF
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Unknown solver options are rejected even when the clauses are Horn and solved without search"""
+
+
+def test_horn_path_rejects_unknown_options():
+    with pytest.raises(TypeError):
+        DPLL.dpll_cdcl(CNF([[-1, 2], [-2]]), [1, 2], bogus=1)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""The budget is started when the clauses are Horn, so the limit that stopped a previous call is forgotten"""
+
+
+def test_horn_path_starts_budget():
+    budget = DPLL.Budget(max_conflicts=10)
+    budget.exhausted_by = 'conflicts'
+
+    model = DPLL.dpll_cdcl(CNF([[-1, 2], [-2]]), [1, 2], budget=budget)
+
+    assert model == {1: False, 2: False}
+    assert budget.exhausted_by is None
@@ -0,0 +1,46 @@
+"""Tests of the preprocessor of the CNF encodings"""
+import itertools
+
+from preprocess import Preprocessor
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Routine that tells if a model satisfies all clauses, symbols missing from the model being false"""
+
+
+def satisfies(model, clauses):
+    return all(any(model.get(abs(literal), False) == (literal > 0) for literal in clause) for clause in clauses)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""A literal reached from a root that implies its own negation is found to fail, not only the root"""
+
+
+def test_failed_literals_reached_from_root():
+    preprocessor = Preprocessor([[-1, 2], [-2, -1], [-3, 1]])
+
+    units = preprocessor.failed_literals(preprocessor.implication_graph())
+
+    assert sorted(units) == [-3, -1]
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Failed literals are added as units, and the simplified formula extends to models of the original formula"""
+
+
+def test_failed_literals_added_as_units():
+    clauses = [[-1, 2], [-2, -1], [-3, 1], [3, 4, 5]]
+    preprocessor = Preprocessor(clauses)
+    preprocessor.substitute_equivalences()
+
+    assert preprocessor.failed == 2
+    simplified = preprocessor.simplify()
+    symbols = sorted({abs(literal) for clause in simplified for literal in clause})
+    for values in itertools.product((False, True), repeat=len(symbols)):
+        model = dict(zip(symbols, values))
+        if satisfies(model, simplified):
+            assert satisfies(preprocessor.extend_model(model), clauses)
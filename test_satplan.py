@@ -0,0 +1,78 @@
+"""Tests of satplan, solving the time horizons of the problems in dat_files"""
+import multiprocessing
+import os
+import time
+
+import pytest
+
+import satplan
+
+DAT_FILES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dat_files')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Fixture that runs a test in a temporary directory with the dimacs_files directory satplan writes to, and
+   time.clock, gone in recent versions of Python, kept for the encoders"""
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    os.mkdir(str(tmp_path / 'dimacs_files'))
+    monkeypatch.chdir(str(tmp_path))
+    if not hasattr(time, 'clock'):
+        monkeypatch.setattr(time, 'clock', time.perf_counter, raising=False)
+
+    return tmp_path
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Solving horizons in parallel finds the plan of blocks3"""
+
+
+def test_parallel_horizons_finds_plan(workdir):
+    sat, model, undecided = satplan.parallel_horizons(os.path.join(DAT_FILES, 'blocks3.dat'), 3, 2, 'cdcl', False,
+                                                      {}, time.clock())
+
+    assert model
+    assert undecided == []
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""A horizon whose solver raises (an unknown option) is reported with its traceback"""
+
+
+def test_parallel_horizons_reports_failed_worker(workdir):
+    with pytest.raises(RuntimeError) as error:
+        satplan.parallel_horizons(os.path.join(DAT_FILES, 'blocks3.dat'), 3, 2, 'cdcl', False, {'bogus': 1},
+                                  time.clock())
+
+    assert 'time horizon 0 failed' in str(error.value)
+    assert 'bogus' in str(error.value)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Routine replacing solve_horizon, ending the worker process at once"""
+
+
+def crash(*args):
+    os._exit(3)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""A horizon worker that dies without answering is reported with its exit code"""
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason='the patched worker must be inherited')
+def test_parallel_horizons_reports_dead_worker(workdir, monkeypatch):
+    monkeypatch.setattr(satplan, 'solve_horizon', crash)
+
+    with pytest.raises(RuntimeError) as error:
+        satplan.parallel_horizons(os.path.join(DAT_FILES, 'blocks3.dat'), 3, 2, 'cdcl', False, {}, time.clock())
+
+    assert 'worker died with exit code 3' in str(error.value)
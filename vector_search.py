@@ -0,0 +1,309 @@
+"""File with the vectorised clause evaluator and local search sat solver, checking many assignments at once and
+running many WalkSAT walkers at once with NumPy"""
+import numpy as np
+
+from cnf import CNF
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Function that splits constraints stored as in CNF (flat symbols and signs, with the offset of each constraint) in
+   groups of constraints with the same number of literals. Returns, per group, the indices of its constraints and
+   their symbols and signs as matrices (constraints x literals), without padding"""
+
+
+def width_groups(symbols, signs, offsets):
+    lengths = np.diff(offsets)
+
+    groups = []
+    for width in np.unique(lengths):
+        if width == 0:  # empty constraints have no literal to evaluate
+            continue
+        indices = np.nonzero(lengths == width)[0]
+        positions = offsets[indices][:, None] + np.arange(width)
+        groups.append((indices, symbols[positions], signs[positions][:, :, None]))
+
+    return groups
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Function that returns the number of true literals of each of n constraints (rows), split in width groups, under
+   each assignment (columns of values). Constraints are evaluated in chunks of about chunk_size literal values, to
+   bound memory"""
+
+
+def count_true(values, groups, n, chunk_size=1 << 22, dtype=np.int32):
+    counts = np.zeros((n, values.shape[1]), dtype=dtype)
+
+    for indices, symbols, signs in groups:
+        chunk = max(1, chunk_size // (values.shape[1] * symbols.shape[1]))  # constraints evaluated at once
+        for start in range(0, len(indices), chunk):
+            end = start + chunk
+            true = values[symbols[start:end]] == signs[start:end]  # constraints x literals x assignments
+            counts[indices[start:end]] = true.sum(axis=1, dtype=dtype)
+
+    return counts
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+class ClauseEvaluator:
+    """Checks one or many assignments against all the clauses at once. Clauses are grouped by length, each group
+    a matrix of literals, so a few vectorised operations evaluate them all: padding every clause to the longest one
+    would not do, since most clauses of a plan have two or three literals but the explanatory frame axioms have
+    hundreds. The flat symbols, signs and offsets of the clauses are kept too, as in CNF. At most one constraints
+    of a CNF are checked as such, numbered after the clauses. An assignment matrix has one row per symbol, row 0
+    unused, and one column per assignment; symbols missing from a model are false, as in write_solution"""
+
+    def __init__(self, clauses, n_vars=0, chunk_size=1 << 22):
+        if not isinstance(clauses, CNF):
+            clauses = CNF(clauses)
+
+        literals = np.array(clauses.literals, dtype=np.int64)
+        self.symbols = np.abs(literals)  # symbol of each literal of the clauses, one clause after the other
+        self.signs = literals > 0  # True for each positive literal
+        self.offsets = np.array(clauses.offsets, dtype=np.int64)  # start of each clause, plus the end of the last
+        self.groups = width_groups(self.symbols, self.signs, self.offsets)
+
+        at_most_one = CNF(clauses.at_most_one)
+        literals = np.array(at_most_one.literals, dtype=np.int64)
+        self.at_most_one = width_groups(np.abs(literals), literals > 0, np.array(at_most_one.offsets, dtype=np.int64))
+        self.n_at_most_one = len(at_most_one)
+
+        if len(self.symbols):
+            n_vars = max(n_vars, int(self.symbols.max()))
+        if len(literals):
+            n_vars = max(n_vars, int(np.abs(literals).max()))
+
+        self.n_clauses = len(clauses)
+        self.n_vars = n_vars
+        self.chunk_size = chunk_size
+        longest = int(np.diff(self.offsets).max()) if self.n_clauses else 0
+        self.count_type = np.uint8 if longest < 256 else np.int32  # smallest type that counts any clause
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the assignment matrix of a list of models (dictionaries symbol -> value)'''
+
+    def assignments(self, models):
+
+        values = np.zeros((self.n_vars + 1, len(models)), dtype=bool)
+        for column in range(len(models)):
+            true = [symbol for symbol, value in models[column].items() if value and symbol <= self.n_vars]
+            values[true, column] = True
+
+        return values
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the number of true literals of every clause (rows) under every assignment (columns)'''
+
+    def true_counts(self, values):
+        return count_true(values, self.groups, self.n_clauses, self.chunk_size, self.count_type)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns a boolean matrix with the constraints (rows) that each assignment (columns) violates:
+       clauses without a true literal and at most one constraints with more than one'''
+
+    def violated(self, values):
+
+        clauses = self.true_counts(values) == 0
+        if not self.n_at_most_one:
+            return clauses
+
+        at_most_one = count_true(values, self.at_most_one, self.n_at_most_one, self.chunk_size)
+        return np.concatenate((clauses, at_most_one > 1))
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the indices of the constraints model does not satisfy, empty if it is a model'''
+
+    def unsatisfied(self, model):
+        return np.nonzero(self.violated(self.assignments([model]))[:, 0])[0]
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the number of violated constraints of each assignment (columns of values), to score
+       many assignments at once'''
+
+    def scores(self, values):
+        return self.violated(values).sum(axis=0)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------------------------------------
+
+class VectorWalkSAT:
+    """WalkSAT run by many walkers at once. The assignments are a (symbols + 1) x walkers boolean matrix, and a
+    ClauseEvaluator counts the true literals of every clause for all walkers in one vectorised pass. Each sweep
+    picks a random false clause per walker, computes the break counts of its symbols through a symbol -> clause
+    occurrence index, and flips one symbol in every walker at once. At most one constraints are expanded into
+    binary clauses. The search is incomplete: it finds models but cannot prove there is none"""
+
+    def __init__(self, clauses, symbols, walkers=256, noise=0.5, seed=None, chunk_size=1 << 22):
+        if isinstance(clauses, CNF):
+            clauses = clauses.expanded()
+
+        rows = []  # clauses without repeated literals nor tautologies
+        self.unsat = False  # True if an empty clause was found
+        for clause in clauses:
+            clause = set(clause)
+            for literal in clause:
+                if -literal in clause:  # tautology
+                    break
+            else:
+                if not clause:
+                    self.unsat = True
+                else:
+                    rows.append(sorted(clause))
+
+        self.evaluator = ClauseEvaluator(rows, max(symbols) if symbols else 0, chunk_size)
+        n_vars = self.evaluator.n_vars
+
+        # symbol -> clause occurrences, the ones of symbol s in positions occurs_start[s] to occurs_start[s + 1]
+        occurring = self.evaluator.symbols
+        clause_ids = np.repeat(np.arange(len(rows)), np.diff(self.evaluator.offsets))
+        order = np.argsort(occurring, kind='mergesort')
+        self.occurs_clause = clause_ids[order]  # clause of each occurrence
+        self.occurs_sign = self.evaluator.signs[order]  # sign of the literal of each occurrence
+        self.occurs_start = np.zeros(n_vars + 2, dtype=np.int64)
+        self.occurs_start[1:] = np.cumsum(np.bincount(occurring, minlength=n_vars + 1))
+
+        self.n_vars = n_vars
+        self.walkers = walkers
+        self.noise = noise  # probability of a random walk step
+        self.rng = np.random.RandomState(seed)
+        self.values = np.zeros((n_vars + 1, walkers), dtype=bool)  # assignment of each walker, one per column
+        self.sweeps = 0  # number of sweeps done so far
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Routine that gives every walker a new random assignment'''
+
+    def reset(self):
+
+        self.values = self.rng.random_sample((self.n_vars + 1, self.walkers)) < 0.5
+        self.values[0] = False  # row of the padding symbol of the candidates
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the number of true literals of every clause (rows) for every walker (columns)'''
+
+    def evaluate(self):
+        return self.evaluator.true_counts(self.values)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns, per walker, a random false clause, or -1 if all its clauses are true'''
+
+    def false_clauses(self, count):
+
+        clause, walker = np.nonzero(count == 0)
+        chosen = np.full(self.walkers, -1, dtype=np.int64)
+
+        # scattered in random order, the last write of each walker is one of its false clauses chosen at random
+        order = self.rng.permutation(len(clause))
+        chosen[walker[order]] = clause[order]
+
+        return chosen
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the symbols of the chosen clause of each walker (walkers x longest chosen clause),
+       padded with symbol 0'''
+
+    def candidates(self, chosen):
+
+        offsets = self.evaluator.offsets
+        start = offsets[chosen]
+        length = offsets[chosen + 1] - start
+        position = np.arange(length.max())
+        valid = position < length[:, None]
+
+        return np.where(valid, self.evaluator.symbols[np.where(valid, start[:, None] + position, 0)], 0)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the break count of each candidate symbol (walkers x width, 0 for padding), i.e. the
+       number of clauses in which it is the only true literal for its walker'''
+
+    def break_counts(self, candidates, count):
+
+        flat = candidates.ravel()
+        walker = np.repeat(np.arange(self.walkers), candidates.shape[1])
+
+        # all occurrences of all candidates, as positions in the occurrence index
+        start = self.occurs_start[flat]
+        length = self.occurs_start[flat + 1] - start
+        owner = np.repeat(np.arange(len(flat)), length)  # candidate of each occurrence
+        offset = np.cumsum(length) - length
+        position = np.arange(length.sum()) - offset[owner] + start[owner]
+
+        clause = self.occurs_clause[position]
+        walker = walker[owner]
+        critical = (count[clause, walker] == 1) & (self.values[flat[owner], walker] == self.occurs_sign[position])
+
+        return np.bincount(owner, weights=critical, minlength=len(flat)).reshape(candidates.shape)
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function with the search loop: up to max_sweeps sweeps, each flipping one symbol per walker. Returns the
+       model of the first walker to satisfy all clauses, None if none did, or False if there is an empty clause'''
+
+    def solve(self, max_sweeps=10000):
+
+        if self.unsat:
+            return False
+
+        rng = self.rng
+        walkers = np.arange(self.walkers)
+        self.reset()
+
+        for _ in range(max_sweeps):
+            count = self.evaluate()
+            chosen = self.false_clauses(count)
+
+            done = np.nonzero(chosen < 0)[0]
+            if len(done):  # walker with no false clause
+                return self.model(done[0])
+
+            candidates = self.candidates(chosen)  # walkers x width, 0 for padding
+            valid = candidates > 0
+            breaks = self.break_counts(candidates, count)
+
+            # greedy step: fewest breaks, ties broken at random, padding never chosen
+            cost = np.where(valid, breaks + rng.random_sample(candidates.shape) * 0.5, np.inf)
+            greedy = cost.argmin(axis=1)
+
+            # random walk step, unless the greedy flip breaks nothing
+            walk = np.where(valid, rng.random_sample(candidates.shape), -1.0).argmax(axis=1)
+            noisy = (rng.random_sample(self.walkers) < self.noise) & (cost[walkers, greedy] >= 1)
+            position = np.where(noisy, walk, greedy)
+
+            flipped = candidates[walkers, position]
+            self.values[flipped, walkers] ^= True
+            self.sweeps += 1
+
+        return None
+
+    # ------------------------------------------------------------------------------------------------------------------
+
+    '''Function that returns the assignment of walker as a model dictionary'''
+
+    def model(self, walker):
+
+        values = self.values[:, walker]
+        return {symbol: bool(values[symbol]) for symbol in range(1, self.n_vars + 1)}
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+"""Vectorised local search sat solver function, returning None if no walker finds a model within max_sweeps"""
+
+
+def vector_walksat(clauses, symbols, max_sweeps=10000, **options):
+    return VectorWalkSAT(clauses, symbols, **options).solve(max_sweeps)